@@ -1,29 +1,108 @@
 from typing import Tuple
 import random
+from cell_pool import CellPool
+from grid import Grid, SPARSE_GRID_THRESHOLD
+from opening_book import opening_line
 from player import Player
 
 class AIPlayer(Player):
-    def __init__(self):
-        super().__init__()
-        self.attacked_positions = set()  # Track all attacked positions
+    __slots__ = ('attacked', 'untried', 'opening')
+
+    def __init__(self, grid=None, size=10, fleet=None, parity=False, grid_class=Grid):
+        super().__init__(grid, size, fleet, grid_class)
+        # Track all attacked positions: a flag per cell, or a set of cell numbers on sparse boards
+        self.attacked = set() if self.grid.size > SPARSE_GRID_THRESHOLD else bytearray(self.grid.size ** 2)
+
+        # Untried cells, checkerboard cells first when parity is on
+        # parity is False, True for a random colour, or the colour (0 or 1) to start with
+        if parity is not False:
+            first = random.randint(0, 1) if parity is True else parity
+            self.untried = [CellPool(self.grid.size, first), CellPool(self.grid.size, 1 - first)]
+        else:
+            self.untried = [CellPool(self.grid.size)]
+
+        # Opening book cells still to fire, looked up at the first shot; False once off the book
+        self.opening = None
 
     def get_shot_position(self) -> Tuple[int, int]:
-        return self._get_random_shot()
+        position = self._opening_shot()
+        return position if position is not None else self._get_random_shot()
+
+    def record_shot_result(self, position, hit, sunk_ship=None):
+        self._mark_attacked(position)
+        if hit:
+            self.opening = False
+
+    def _opening_shot(self):
+        # Next shot of the opening book, None once the game has left it
+        if self.opening is None:
+            fresh = not (self.attacked if isinstance(self.attacked, set) else any(self.attacked))
+            line = opening_line(type(self).__name__, self.grid.size, self.fleet) if fresh else None
+            self.opening = line[::-1] if line else False
+        if not self.opening:
+            return None
+        position = divmod(self.opening.pop(), self.grid.size)
+        if self.is_attacked(position):
+            # Something other than the book chose a shot, so the line no longer applies
+            self.opening = False
+            return None
+        self._mark_attacked(position)
+        return position
 
     def _get_random_shot(self) -> Tuple[int, int]:
-        available_positions = [
-            (row, col) 
-            for row in range(self.grid.size) 
-            for col in range(self.grid.size) 
-            if (row, col) not in self.attacked_positions
-        ]
-        if available_positions:
-            position = random.choice(available_positions)
-            self.attacked_positions.add(position)  # Mark this position as attacked
-            return position
+        for pool in self.untried:
+            if pool:
+                position = pool.draw()
+                self._set_attacked(position)  # Mark this position as attacked
+                return position
         return (0, 0)  # Default return if no available positions
 
+    def _mark_attacked(self, position: Tuple[int, int]):
+        # Keep the untried pools in step with shots chosen without them
+        if not self.is_attacked(position):
+            self._set_attacked(position)
+            for pool in self.untried:
+                pool.discard(position)
+
+    def is_attacked(self, position):
+        number = position[0] * self.grid.size + position[1]
+        if isinstance(self.attacked, set):
+            return number in self.attacked
+        return self.attacked[number] == 1
+
+    def _set_attacked(self, position):
+        number = position[0] * self.grid.size + position[1]
+        if isinstance(self.attacked, set):
+            self.attacked.add(number)
+        else:
+            self.attacked[number] = 1
+
+    @property
+    def attacked_positions(self):
+        # Set view of the attacked cells
+        size = self.grid.size
+        if isinstance(self.attacked, set):
+            return {divmod(number, size) for number in self.attacked}
+        return {divmod(number, size) for number, flag in enumerate(self.attacked) if flag}
+
+    def get_parity(self):
+        # False, or the checkerboard colour drawn first
+        return self.untried[0].parity if len(self.untried) == 2 else False
+
+    def to_dict(self):
+        data = super().to_dict()
+        data['attacked'] = [list(pos) for pos in self.attacked_positions]
+        data['parity'] = self.get_parity()
+        return data
+
+    @classmethod
+    def from_dict(cls, data, grid_class=Grid, **kwargs):
+        ai = super().from_dict(data, grid_class, parity=data['parity'], **kwargs)
+        for pos in data['attacked']:
+            ai._mark_attacked(tuple(pos))
+        return ai
+
     def _is_valid_target(self, pos: Tuple[int, int]) -> bool:
         row, col = pos
         grid_size = self.grid.size
-        return (0 <= row < grid_size and 0 <= col < grid_size and pos not in self.attacked_positions)
+        return (0 <= row < grid_size and 0 <= col < grid_size and not self.is_attacked(pos))
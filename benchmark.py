@@ -0,0 +1,272 @@
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+from ai_player import AIPlayer
+from density_ai_player import DensityAIPlayer
+from game_controller import GameController
+from player import Player
+from ship import Ship, SHIPS
+from simulation import GRID_BACKENDS, play_game
+
+## Cases are timed at every size and fleet unless they raise SkipCase
+DEFAULT_SIZES = (10, 50, 200)
+FLEETS = ('standard', 'scaled')
+
+
+class SkipCase(Exception):
+    pass
+
+
+def make_fleet(kind, size):
+
+    ## 'scaled' repeats the standard fleet once per 10x10 worth of board
+    if kind == 'standard':
+        return dict(SHIPS)
+    copies = max(1, size * size // 100)
+    return {f"{name} {copy}": ship_size for copy in range(copies) for name, ship_size in SHIPS.items()}
+
+
+def make_grid(backend, size):
+
+    return GRID_BACKENDS[backend](size)
+
+
+def lattice_layout(size, fleet):
+
+    ## deterministic non-touching layout: ships on every other row, spaced out along it
+    step = max(fleet.values()) + 1
+    per_row = max(1, (size + 1) // step)
+    layout = []
+    for number, (name, ship_size) in enumerate(fleet.items()):
+        row, slot = divmod(number, per_row)
+        if 2 * row >= size:
+            raise SkipCase("fleet does not fit the board")
+        layout.append((name, ship_size, (2 * row, slot * step)))
+    return layout
+
+
+def fleet_grid(backend, size, fleet):
+
+    grid = make_grid(backend, size)
+    for name, ship_size, start in lattice_layout(size, fleet):
+        grid.place_ship(Ship(name, ship_size), start, 'horizontal')
+    return grid
+
+
+def all_cells(size):
+
+    cells = [(row, col) for row in range(size) for col in range(size)]
+    random.shuffle(cells)
+    return cells
+
+
+def bench_place_ship(backend, size, fleet_kind):
+
+    fleet = make_fleet(fleet_kind, size)
+    layout = lattice_layout(size, fleet)
+    grid = make_grid(backend, size)
+    ships = [(Ship(name, ship_size), start) for name, ship_size, start in layout]
+
+    started = time.perf_counter()
+    for ship, start in ships:
+        grid.place_ship(ship, start, 'horizontal')
+    return time.perf_counter() - started, len(ships)
+
+
+def bench_receive_shot(backend, size, fleet_kind):
+
+    grid = fleet_grid(backend, size, make_fleet(fleet_kind, size))
+    cells = all_cells(size)
+
+    started = time.perf_counter()
+    for pos in cells:
+        grid.receive_shot(pos)
+    return time.perf_counter() - started, len(cells)
+
+
+def bench_get_cell_state(backend, size, fleet_kind):
+
+    grid = fleet_grid(backend, size, make_fleet(fleet_kind, size))
+    cells = all_cells(size)
+    for pos in cells[:len(cells) // 2]:
+        grid.receive_shot(pos)
+
+    started = time.perf_counter()
+    for pos in cells:
+        grid.get_cell_state(pos)
+    return time.perf_counter() - started, len(cells)
+
+
+def bench_place_ships_randomly(backend, size, fleet_kind):
+
+    fleet = make_fleet(fleet_kind, size)
+    players = [Player(make_grid(backend, size), fleet=fleet) for _ in range(5)]
+
+    started = time.perf_counter()
+    for player in players:
+        player.place_ships_randomly()
+    return time.perf_counter() - started, len(players)
+
+
+def _bench_ai(ai_class, backend, size, fleet_kind, max_shots=2000):
+
+    ## stops after max_shots so large boards stay affordable
+    fleet = make_fleet(fleet_kind, size)
+    target = Player(make_grid(backend, size), fleet=fleet)
+    target.place_ships_randomly(guaranteed=True)
+    ai = ai_class(make_grid(backend, size), fleet=fleet)
+
+    elapsed, shots = 0.0, 0
+    while not target.all_ships_sunk() and shots < max_shots:
+        started = time.perf_counter()
+        position = ai.get_shot_position()
+        elapsed += time.perf_counter() - started
+        hit, sunk_ship = target.receive_shot(position)
+        ai.record_shot_result(position, hit, sunk_ship)
+        shots += 1
+    return elapsed, shots
+
+
+def bench_random_ai(backend, size, fleet_kind):
+
+    return _bench_ai(AIPlayer, backend, size, fleet_kind)
+
+
+def bench_density_ai(backend, size, fleet_kind):
+
+    return _bench_ai(DensityAIPlayer, backend, size, fleet_kind)
+
+
+def bench_game_loop(backend, size, fleet_kind):
+
+    controller = GameController(ai_player_class=AIPlayer, player_class=AIPlayer, grid_size=size,
+                                fleet=make_fleet(fleet_kind, size), grid_class=GRID_BACKENDS[backend])
+
+    started = time.perf_counter()
+    play_game(controller)
+    return time.perf_counter() - started, 1
+
+
+CASES = {
+    'grid.place_ship': bench_place_ship,
+    'grid.receive_shot': bench_receive_shot,
+    'grid.get_cell_state': bench_get_cell_state,
+    'player.place_ships_randomly': bench_place_ships_randomly,
+    'ai.get_shot_position[random]': bench_random_ai,
+    'ai.get_shot_position[density]': bench_density_ai,
+    'controller.game_loop': bench_game_loop,
+}
+
+
+def run_case(case, backend, size, fleet_kind, min_time, max_rounds=1000):
+
+    ## repeats fresh rounds until min_time of measured work and keeps the
+    ## median per-operation time, which is steadier than the mean
+    per_op, measured = [], 0.0
+    while measured < min_time and len(per_op) < max_rounds:
+        elapsed, ops = case(backend, size, fleet_kind)
+        per_op.append(elapsed / ops)
+        measured += elapsed
+    return statistics.median(per_op)
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, fleets=FLEETS, backends=tuple(GRID_BACKENDS), cases=tuple(CASES),
+                   min_time=0.2, seed=0):
+
+    random.seed(seed)
+    results, skipped = {}, {}
+    for name in cases:
+        for backend in backends:
+            for size in sizes:
+                for fleet_kind in fleets:
+                    key = f"{name}[{backend},{size},{fleet_kind}]"
+                    try:
+                        results[key] = run_case(CASES[name], backend, size, fleet_kind, min_time)
+                    except SkipCase as reason:
+                        skipped[key] = str(reason)
+    return results, skipped
+
+
+def measure_game_memory(ai_class, size=10, games=50, seed=0):
+
+    ## bytes each finished game keeps alive: controller, both players, grids and AI state
+    random.seed(seed)
+    fleet = make_fleet('standard', size)
+    ## one game first, so shared caches are not billed to the measured ones
+    play_game(GameController(ai_player_class=ai_class, player_class=AIPlayer, grid_size=size, fleet=fleet))
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = []
+    for _ in range(games):
+        controller = GameController(ai_player_class=ai_class, player_class=AIPlayer, grid_size=size, fleet=fleet)
+        play_game(controller)
+        kept.append(controller)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used / games
+
+
+def compare(results, baseline, threshold):
+
+    ## yields (key, baseline, current, ratio, regressed) for every shared case
+    for key, current in results.items():
+        if key in baseline:
+            ratio = current / baseline[key] if baseline[key] else float('inf')
+            yield key, baseline[key], current, ratio, ratio > threshold
+
+
+def format_time(seconds):
+
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.2f} {unit}"
+    return f"{seconds / 1e-9:8.2f} ns"
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Time the game core hot paths")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES))
+    parser.add_argument('--fleets', nargs='+', choices=FLEETS, default=list(FLEETS))
+    parser.add_argument('--backends', nargs='+', choices=sorted(GRID_BACKENDS), default=list(GRID_BACKENDS))
+    parser.add_argument('--cases', nargs='+', choices=sorted(CASES), default=list(CASES))
+    parser.add_argument('--min-time', type=float, default=0.2, help="seconds of measured work per case")
+    parser.add_argument('--save', help="write the results to this baseline file")
+    parser.add_argument('--compare', help="compare against this baseline file")
+    parser.add_argument('--threshold', type=float, default=1.25, help="slowdown ratio reported as a regression")
+    parser.add_argument('--memory', action='store_true', help="report the memory a finished game keeps instead")
+    args = parser.parse_args()
+
+    if args.memory:
+        for size in args.sizes:
+            for name, ai_class in (('random', AIPlayer), ('density', DensityAIPlayer)):
+                print(f"game memory[{name},{size}]{'':40} {measure_game_memory(ai_class, size) / 1024:8.1f} KiB/game")
+        sys.exit(0)
+
+    results, skipped = run_benchmarks(args.sizes, args.fleets, args.backends, args.cases, args.min_time)
+    for key, seconds in results.items():
+        print(f"{key:60} {format_time(seconds)}/op")
+    for reason in sorted(set(skipped.values())):
+        count = sum(1 for value in skipped.values() if value == reason)
+        print(f"skipped {count} case(s): {reason}")
+
+    if args.save:
+        with open(args.save, 'w') as baseline_file:
+            json.dump(results, baseline_file, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = 0
+        print()
+        for key, before, after, ratio, regressed in compare(results, baseline, args.threshold):
+            regressions += regressed
+            flag = "REGRESSION" if regressed else ""
+            print(f"{key:60} {format_time(before)} -> {format_time(after)}  x{ratio:5.2f} {flag}")
+        print(f"\n{regressions} regression(s) above x{args.threshold}")
+        sys.exit(1 if regressions else 0)
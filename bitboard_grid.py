@@ -0,0 +1,176 @@
+from array import array
+from functools import lru_cache
+
+from grid import Grid, HIT, MISS
+from ship import ShipOrientation
+
+
+## Cell (row, col) lives at bit row * size + col of every bitboard
+def cell_bit(size, row, col):
+
+    return 1 << (row * size + col)
+
+
+def mask_to_positions(size, mask):
+
+    positions = []
+    while mask:
+        low = mask & -mask
+        positions.append(divmod(low.bit_length() - 1, size))
+        mask ^= low
+    return positions
+
+
+def _span_mask(size, row0, col0, row1, col1):
+
+    ## rectangle clipped to the board
+    row0, col0 = max(row0, 0), max(col0, 0)
+    row1, col1 = min(row1, size - 1), min(col1, size - 1)
+    row_bits = ((1 << (col1 - col0 + 1)) - 1) << col0
+    mask = 0
+    for row in range(row0, row1 + 1):
+        mask |= row_bits << (row * size)
+    return mask
+
+
+@lru_cache(maxsize=4096)
+def rect_masks(size, row0, col0, row1, col1):
+
+    ## (cells, halo) of a ship covering the rectangle, the halo being the
+    ## ship plus every neighbouring cell another ship is not allowed to touch
+    cells = _span_mask(size, row0, col0, row1, col1)
+    halo = _span_mask(size, row0 - 1, col0 - 1, row1 + 1, col1 + 1)
+    return cells, halo
+
+
+def placement_masks(size, ship_size, row, col, orientation):
+
+    if orientation == 'horizontal':
+        return rect_masks(size, row, col, row, col + ship_size - 1)
+    return rect_masks(size, row, col, row + ship_size - 1, col)
+
+
+class BitboardGrid(Grid):
+    ## Drop-in Grid whose occupancy and shot state are integer bitboards
+    __slots__ = ('occupied', 'shot_bits', 'hit_bits', 'miss_bits', '_ship_masks', '_cell_ships')
+
+    def __init__(self, size=10):
+
+        self.size = size
+        ## the bitboards below stand in for Grid's cell arrays; shot_counts works as in Grid
+        self.sparse = False
+        self.grid = None
+        self.shot_states = None
+        self.shot_counts = [0, 0, 0]
+        self.ships = []
+        self.occupied = 0
+        self.shot_bits = 0
+        self.hit_bits = 0
+        self.miss_bits = 0
+        self._ship_masks = []
+        self._cell_ships = {}  # cell index -> ship, so a hit finds its ship directly
+        self.ships_afloat = 0
+        self.shot_log = array('Q')
+        self._make_views()
+
+    def place_ship(self, ship, start_pos, orientation):
+
+        if not self._is_valid_orientation(orientation):
+            return False
+
+        positions = self._calculate_ship_positions(ship.size, start_pos, orientation)
+        if not positions:
+            return False
+
+        cells, halo = placement_masks(self.size, ship.size, start_pos[0], start_pos[1], orientation)
+        if self.occupied & halo:
+            return False
+
+        ship.position = tuple(positions)
+        ship.orientation = ShipOrientation.HORIZONTAL if orientation == 'horizontal' else ShipOrientation.VERTICAL
+        self.ships.append(ship)
+        self._ship_masks.append(cells)
+        self.occupied |= cells
+        for row, col in positions:
+            self._cell_ships[row * self.size + col] = ship
+        self.ships_afloat += 1
+        return True
+
+    def receive_shot(self, pos):
+
+        if not self._is_within_grid(pos):
+            return False, None
+
+        number = pos[0] * self.size + pos[1]
+        if self.shot_bits >> number & 1:
+            return False, None
+
+        bit = 1 << number
+        self.shot_bits |= bit
+        ship = self._cell_ships.get(number)
+        if ship is None:
+            self.miss_bits |= bit
+            self.shot_counts[MISS] += 1
+            self.shot_log.append(number << 2 | MISS)
+            return False, None
+
+        self.hit_bits |= bit
+        self.shot_counts[HIT] += 1
+        self.shot_log.append(number << 2 | HIT)
+        ship.take_hit(pos)
+        sunk = ship if ship.is_sunk() else None
+        if sunk is not None:
+            self.ships_afloat -= 1
+        return True, sunk
+
+    def _ship_at(self, row, col):
+
+        return self._cell_ships.get(row * self.size + col)
+
+    def get_cell_state(self, pos):
+
+        if not self._is_within_grid(pos):
+            return 'invalid'
+
+        number = pos[0] * self.size + pos[1]
+        ship = self._cell_ships.get(number)
+        if ship is not None:
+            return 'hit' if ship.is_hit_at(pos) else 'ship'
+        return 'miss' if self.miss_bits >> number & 1 else 'empty'
+
+    def _is_valid_placement(self, positions):
+
+        if not positions:
+            return True
+        (row0, col0), (row1, col1) = min(positions), max(positions)
+        return not self.occupied & rect_masks(self.size, row0, col0, row1, col1)[1]
+
+    def all_ships_sunk(self):
+
+        return self.ships_afloat == 0
+
+    def get_all_ship_positions(self):
+
+        return set(mask_to_positions(self.size, self.occupied))
+
+    def _shot_state(self, row, col):
+
+        ## a ship cell knows its own hits, so only water reads the (long) miss bitboard
+        number = row * self.size + col
+        ship = self._cell_ships.get(number)
+        if ship is not None:
+            return HIT if ship.is_hit_at((row, col)) else 0
+        return MISS if self.miss_bits >> number & 1 else 0
+
+    def clear(self):
+
+        self.ships.clear()
+        self._ship_masks.clear()
+        self._cell_ships.clear()
+        self.ships_afloat = 0
+        self.occupied = 0
+        self.shot_bits = 0
+        self.hit_bits = 0
+        self.miss_bits = 0
+        self.shot_counts = [0, 0, 0]
+        self.shot_log = array('Q')
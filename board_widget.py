@@ -0,0 +1,101 @@
+from PyQt6.QtWidgets import QWidget
+from PyQt6.QtCore import Qt, QRect, pyqtSignal
+from PyQt6.QtGui import QColor, QPainter, QPen
+
+## Cell states, kept one byte per cell
+STATES = ('empty', 'ship', 'hit', 'miss')
+HIGHLIGHT_COLOR = '#e74c3c'
+HOVER_COLOR = '#c0392b'
+
+
+class BoardWidget(QWidget):
+    ## A whole board in one widget: paints its cells and reports clicks as (row, col)
+    cellClicked = pyqtSignal(int, int)
+
+    def __init__(self, grid_size, colors, parent=None):
+        super().__init__(parent)
+
+        self.colors = [QColor(colors[state]) for state in STATES]
+        self.grid_size = None
+        self.hovered = None
+        self.reset(grid_size)
+        self.setMouseTracking(True)
+
+    def set_cell(self, position, state):
+        row, col = position
+        code = STATES.index(state)
+        if self.states[row * self.grid_size + col] != code:
+            self.states[row * self.grid_size + col] = code
+            self.update(self._cell_rect(position))
+
+    def set_highlight(self, position):
+        for cell in (self.highlighted, position):
+            if cell is not None:
+                self.update(self._cell_rect(cell))
+        self.highlighted = position
+
+    def reset(self, grid_size=None):
+        # Blank board, resized when a different grid_size is given
+        if grid_size is not None and grid_size != self.grid_size:
+            self.grid_size = grid_size
+            # Same sizing as the old per-cell buttons (max 600px), 1px between cells when there is room
+            self.cell_size = max(1, min(40, 600 // grid_size))
+            self.gap = 1 if self.cell_size > 2 else 0
+            self.pitch = self.cell_size + self.gap
+            side = grid_size * self.pitch - self.gap
+            self.setFixedSize(side, side)
+        self.states = bytearray(self.grid_size * self.grid_size)
+        self.highlighted = None
+        self.update()
+
+    def cell_at(self, point):
+        row, col = point.y() // self.pitch, point.x() // self.pitch
+        if 0 <= row < self.grid_size and 0 <= col < self.grid_size:
+            return (row, col)
+        return None
+
+    def _cell_rect(self, position):
+        row, col = position
+        return QRect(col * self.pitch, row * self.pitch, self.cell_size, self.cell_size)
+
+    def mousePressEvent(self, event):
+        cell = self.cell_at(event.position().toPoint())
+        if event.button() == Qt.MouseButton.LeftButton and cell is not None:
+            self.cellClicked.emit(*cell)
+
+    def mouseMoveEvent(self, event):
+        cell = self.cell_at(event.position().toPoint())
+        if cell != self.hovered:
+            for changed in (self.hovered, cell):
+                if changed is not None:
+                    self.update(self._cell_rect(changed))
+            self.hovered = cell
+
+    def leaveEvent(self, event):
+        if self.hovered is not None:
+            self.update(self._cell_rect(self.hovered))
+            self.hovered = None
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        area = event.rect()
+
+        # Only the cells inside the damaged area are drawn
+        first_row = max(0, area.top() // self.pitch)
+        last_row = min(self.grid_size - 1, area.bottom() // self.pitch)
+        first_col = max(0, area.left() // self.pitch)
+        last_col = min(self.grid_size - 1, area.right() // self.pitch)
+        for row in range(first_row, last_row + 1):
+            offset = row * self.grid_size
+            for col in range(first_col, last_col + 1):
+                painter.fillRect(col * self.pitch, row * self.pitch, self.cell_size, self.cell_size,
+                                 self.colors[self.states[offset + col]])
+
+        if self.highlighted is not None:
+            hovered = self.highlighted == self.hovered and self.isEnabled()
+            width = 3 if hovered else 2
+            painter.setPen(QPen(QColor(HOVER_COLOR if hovered else HIGHLIGHT_COLOR), width))
+            painter.setBrush(Qt.BrushStyle.NoBrush)
+            rect = self._cell_rect(self.highlighted)
+            painter.drawRect(rect.adjusted(width // 2, width // 2, -(width + 1) // 2, -(width + 1) // 2))
+        painter.end()
@@ -0,0 +1,115 @@
+import random
+from array import array
+
+## Pools up to this many cells keep the shuffle in flat arrays, bigger ones in dicts
+DENSE_POOL_LIMIT = 4096
+
+
+class CellPool:
+    ## Untried cells of a board kept as a Fisher-Yates shuffle: drawing or
+    ## removing a cell is O(1). Small pools store every slot in two arrays,
+    ## large ones only the slots that were swapped.
+    ## With parity set to 0 or 1 the pool only holds the cells where
+    ## (row + col) % 2 == parity.
+
+    def __init__(self, board_size, parity=None):
+
+        self.board_size = board_size
+        self.parity = parity
+        if parity is None:
+            self.remaining = board_size * board_size
+        else:
+            self.remaining = (board_size // 2) * board_size + (board_size % 2) * self._row_count(parity)
+        self.dense = self.remaining <= DENSE_POOL_LIMIT
+        if self.dense:
+            self._slots = array('H', range(self.remaining))
+            self._where = array('H', range(self.remaining))
+        else:
+            self._slots = {}
+            self._where = {}
+
+    def __len__(self):
+
+        return self.remaining
+
+    def __contains__(self, pos):
+
+        number = self._number(pos)
+        if number is None:
+            return False
+        return 0 <= self._slot_of(number) < self.remaining
+
+    def draw(self):
+
+        number = self._take(random.randrange(self.remaining))
+        return self._cell(number)
+
+    def discard(self, pos):
+
+        number = self._number(pos)
+        if number is None:
+            return False
+        slot = self._slot_of(number)
+        if not 0 <= slot < self.remaining:
+            return False
+        self._take(slot)
+        return True
+
+    def _slot_of(self, number):
+
+        if self.dense:
+            return self._where[number]
+        return self._where.get(number, number)
+
+    def _take(self, slot):
+
+        ## swap the slot with the last live one and shrink the pool
+        last = self.remaining - 1
+        if self.dense:
+            number, moved = self._slots[slot], self._slots[last]
+            self._slots[slot], self._slots[last] = moved, number
+            self._where[moved], self._where[number] = slot, last
+            self.remaining = last
+            return number
+
+        number = self._slots.get(slot, slot)
+        moved = self._slots.get(last, last)
+        self._slots[slot] = moved
+        self._where[moved] = slot
+        self._slots.pop(last, None)
+        self._where[number] = -1
+        self.remaining = last
+        return number
+
+    def _row_count(self, start_col):
+
+        return (self.board_size - start_col + 1) // 2
+
+    def _number(self, pos):
+
+        row, col = pos
+        size = self.board_size
+        if not (0 <= row < size and 0 <= col < size):
+            return None
+        if self.parity is None:
+            return row * size + col
+        if (row + col) % 2 != self.parity:
+            return None
+
+        ## two consecutive rows always hold board_size cells of one parity
+        number = (row // 2) * size + col // 2
+        if row % 2:
+            number += self._row_count(self.parity)
+        return number
+
+    def _cell(self, number):
+
+        size = self.board_size
+        if self.parity is None:
+            return divmod(number, size)
+
+        pair, rest = divmod(number, size)
+        first_row = self._row_count(self.parity)
+        if rest < first_row:
+            return (2 * pair, self.parity + 2 * rest)
+        return (2 * pair + 1, 1 - self.parity + 2 * (rest - first_row))
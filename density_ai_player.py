@@ -0,0 +1,161 @@
+import random
+from collections import Counter
+from functools import lru_cache
+from typing import Tuple
+
+from ai_player import AIPlayer
+from grid import Grid
+from placement_index import legal_placements
+
+
+@lru_cache(maxsize=32)
+def placement_table(board_size, ship_size):
+
+    ## (cells of every placement, placements covering every cell), cells as row * size + col
+    cells = []
+    covering = [[] for _ in range(board_size * board_size)]
+    for orientation, step in (('horizontal', 1), ('vertical', board_size)):
+        for placement in legal_placements(board_size, ship_size, orientation):
+            row, col = placement.start
+            first = row * board_size + col
+            placement_cells = tuple(range(first, first + step * ship_size, step))
+            for idx in placement_cells:
+                covering[idx].append(len(cells))
+            cells.append(placement_cells)
+    return tuple(cells), tuple(tuple(pids) for pids in covering)
+
+
+class DensityAIPlayer(AIPlayer):
+    ## Fires at the cell covered by the most placements of the ships still afloat.
+    ## The heat map is only touched where a shot rules placements out.
+    __slots__ = ('afloat', 'tables', 'alive', 'counts', 'heat', 'blocked', 'tried', 'open_hits')
+
+    def __init__(self, grid=None, size=10, fleet=None, parity=False, grid_class=Grid):
+        super().__init__(grid, size, fleet, parity, grid_class)
+        size = self.grid.size
+        ## the opponent plays with the same fleet
+        self.afloat = Counter(self.fleet.values())
+        self.tables = {ship_size: placement_table(size, ship_size) for ship_size in self.afloat}
+        self.alive = {}
+        self.counts = {}
+        self.heat = [0] * (size * size)
+        for ship_size, (cells, covering) in self.tables.items():
+            self.alive[ship_size] = bytearray(b'\x01') * len(cells)
+            counts = [len(pids) for pids in covering]
+            self.counts[ship_size] = counts
+            for idx, count in enumerate(counts):
+                self.heat[idx] += self.afloat[ship_size] * count
+        self.blocked = bytearray(size * size)
+        self.tried = bytearray(size * size)
+        self.open_hits = set()
+
+    def get_shot_position(self) -> Tuple[int, int]:
+        position = self._opening_shot()
+        if position is not None:
+            self.tried[position[0] * self.grid.size + position[1]] = 1
+            return position
+
+        target = self._best_target_cell() if self.open_hits else None
+        if target is None:
+            target = self._best_hunt_cell()
+        if target is None:
+            return self._get_random_shot()
+
+        self.tried[target] = 1
+        position = divmod(target, self.grid.size)
+        self._mark_attacked(position)
+        return position
+
+    def record_shot_result(self, position, hit, sunk_ship=None):
+        size = self.grid.size
+        row, col = position
+        self.tried[row * size + col] = 1
+        self._mark_attacked(position)
+
+        if not hit:
+            self._block(row * size + col)
+        else:
+            self.opening = False
+            self.open_hits.add(row * size + col)
+            ## ships never touch, so the diagonal neighbours of a hit are water
+            for d_row, d_col in ((-1, -1), (-1, 1), (1, -1), (1, 1)):
+                if 0 <= row + d_row < size and 0 <= col + d_col < size:
+                    self._block((row + d_row) * size + col + d_col)
+
+        if sunk_ship is not None:
+            rows = [pos[0] for pos in sunk_ship.position]
+            cols = [pos[1] for pos in sunk_ship.position]
+            for pos in sunk_ship.position:
+                self.open_hits.discard(pos[0] * size + pos[1])
+            for r in range(max(min(rows) - 1, 0), min(max(rows) + 2, size)):
+                for c in range(max(min(cols) - 1, 0), min(max(cols) + 2, size)):
+                    self._block(r * size + c)
+            self._remove_ship(sunk_ship.size)
+
+    def _block(self, idx):
+
+        ## no ship can cover this cell any more
+        if self.blocked[idx]:
+            return
+        self.blocked[idx] = 1
+        heat = self.heat
+        for ship_size, (cells, covering) in self.tables.items():
+            alive = self.alive[ship_size]
+            counts = self.counts[ship_size]
+            weight = self.afloat[ship_size]
+            for pid in covering[idx]:
+                if alive[pid]:
+                    alive[pid] = 0
+                    for cell in cells[pid]:
+                        counts[cell] -= 1
+                        heat[cell] -= weight
+
+    def _remove_ship(self, ship_size):
+
+        if not self.afloat[ship_size]:
+            return
+        self.afloat[ship_size] -= 1
+        heat = self.heat
+        for idx, count in enumerate(self.counts[ship_size]):
+            if count:
+                heat[idx] -= count
+
+    def _best_hunt_cell(self):
+
+        best, best_cells = 1, []
+        tried = self.tried
+        for idx, value in enumerate(self.heat):
+            if value < best or tried[idx]:
+                continue
+            if value > best:
+                best, best_cells = value, [idx]
+            else:
+                best_cells.append(idx)
+        return random.choice(best_cells) if best_cells else None
+
+    def _best_target_cell(self):
+
+        ## only placements through an unresolved hit count, the more hits they
+        ## line up with the more they weigh
+        candidates = set()
+        for hit_idx in self.open_hits:
+            for ship_size, (cells, covering) in self.tables.items():
+                if not self.afloat[ship_size]:
+                    continue
+                alive = self.alive[ship_size]
+                for pid in covering[hit_idx]:
+                    if alive[pid]:
+                        candidates.add((ship_size, pid))
+
+        scores = {}
+        for ship_size, pid in candidates:
+            cells = self.tables[ship_size][0][pid]
+            open_cells = [cell for cell in cells if not self.tried[cell]]
+            weight = self.afloat[ship_size] * 10 ** (len(cells) - len(open_cells))
+            for cell in open_cells:
+                scores[cell] = scores.get(cell, 0) + weight
+
+        if not scores:
+            return None
+        best = max(scores.values())
+        return random.choice([cell for cell, score in scores.items() if score == best])
@@ -0,0 +1,107 @@
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from ship import Ship
+
+## Events GameController publishes. side is 'player' or 'ai', the seat that acted.
+
+
+@dataclass(slots=True)
+class GameStarted:
+
+    grid_size: int
+    fleet: dict
+
+
+@dataclass(slots=True)
+class ShipPlaced:
+
+    side: str
+    ship: Ship
+
+
+@dataclass(slots=True)
+class ShotFired:
+
+    ## also the result process_player_shot and process_ai_turn return
+    side: str
+    position: Tuple[int, int]
+    hit: bool
+    ship: Optional[Ship] = None  # the ship struck, None on a miss
+    sunk: bool = False
+    game_over: bool = False
+
+    @property
+    def winner(self):
+
+        return self.side if self.game_over else None
+
+    @property
+    def ship_name(self):
+
+        return self.ship.name if self.sunk else None
+
+
+@dataclass(slots=True)
+class ShipSunk:
+
+    side: str
+    ship: Ship
+
+
+@dataclass(slots=True)
+class TurnChanged:
+
+    turn: Optional[str]
+
+
+@dataclass(slots=True)
+class GameOver:
+
+    winner: str
+
+
+class EventBus:
+    ## Callbacks are registered per event class. Publishers ask wants() first, so an
+    ## event nobody listens to is never built. With batched=True events queue up
+    ## until flush(), which headless runs call once per game.
+
+    __slots__ = ('subscribers', 'batched', 'pending')
+
+    def __init__(self, batched=False):
+
+        self.subscribers = {}
+        self.batched = batched
+        self.pending = []
+
+    def subscribe(self, event_type, callback):
+
+        self.subscribers.setdefault(event_type, []).append(callback)
+
+    def unsubscribe(self, event_type, callback):
+
+        callbacks = self.subscribers.get(event_type, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+        if not callbacks:
+            self.subscribers.pop(event_type, None)
+
+    def wants(self, event_type):
+
+        return event_type in self.subscribers
+
+    def publish(self, event):
+
+        if self.batched:
+            self.pending.append(event)
+            return
+        for callback in self.subscribers.get(type(event), ()):
+            callback(event)
+
+    def flush(self):
+
+        pending, self.pending = self.pending, []
+        subscribers = self.subscribers
+        for event in pending:
+            for callback in subscribers.get(type(event), ()):
+                callback(event)
@@ -1,29 +1,46 @@
 from player import Player
 from ai_player import AIPlayer
+from events import EventBus, GameOver, GameStarted, ShipPlaced, ShipSunk, ShotFired, TurnChanged
 from grid import Grid
 from ship import SHIPS
 
 class GameController:
-    def __init__(self):
+    __slots__ = ('player', 'ai_player', 'current_turn', 'game_over', 'selected_position', 'grid_size', 'fleet',
+                 'ai_player_class', 'player_class', 'events', 'journal', 'stats', 'player_name',
+                 'grid_class')
+
+    def __init__(self, ai_player_class=AIPlayer, player_class=Player, grid_size=10, fleet=None, journal=None,
+                 events=None, player_name='Player', grid_class=Grid):
         self.player = None
         self.ai_player = None
         self.current_turn = None
         self.game_over = False
         self.selected_position = None
-        self.grid_size = Grid().size  
-        self.main_window = None
+        self.grid_size = grid_size
+        self.fleet = dict(fleet or SHIPS)
+        self.ai_player_class = ai_player_class
+        self.player_class = player_class
+        # UI, statistics, journaling and network layers subscribe here
+        self.events = events if events is not None else EventBus()
+        self.journal = journal  # Optional GameJournal recording placements and shots
+        if journal is not None:
+            journal.subscribe(self.events)
         self.stats = {
             'total_shots': 0,
             'hits': 0,
             'misses': 0
         }
+        self.player_name = player_name
+        self.grid_class = grid_class  # Both boards are built from it, Grid or BitboardGrid
 
-    def start_new_game(self):
-        self.player = Player()
-        self.ai_player = AIPlayer()
+    def start_new_game(self, place_ai_ships=True):
+        # place_ai_ships=False leaves the AI's seat empty for a second human
+        self.player = self.player_class(size=self.grid_size, fleet=self.fleet, grid_class=self.grid_class)
+        self.ai_player = self.ai_player_class(size=self.grid_size, fleet=self.fleet, grid_class=self.grid_class)
         
         self.current_turn = 'player'
         self.game_over = False
+        self._publish(GameStarted, self.grid_size, self.fleet)
         
         # Reset statistics for new game
         self.stats.update({
@@ -31,9 +48,10 @@ class GameController:
             'hits': 0,
             'misses': 0
         })
-        
+
         # AI places its ships randomly
-        self.ai_player.place_ships_randomly()
+        if place_ai_ships and not self.place_ai_ships_randomly():
+            raise RuntimeError(f"The fleet does not fit on a {self.grid_size}x{self.grid_size} board")
         return True
     
 
@@ -44,7 +62,9 @@ class GameController:
         if self.player is None:
             return False
             
-        success = self.player.place_ship(ship_name, SHIPS[ship_name], start_pos, orientation)
+        success = self.player.place_ship(ship_name, self.fleet[ship_name], start_pos, orientation)
+        if success:
+            self._placed('player', self.player.grid.ships[-1:])
         
         if success and not self.player.remaining_ships:
             self.start_gameplay()
@@ -55,10 +75,33 @@ class GameController:
         if self.player is None:
             return False
         
-        success = self.player.place_ships_randomly()
+        success = self._place_randomly('player', self.player)
         if success:
             self.start_gameplay()
         return success
+
+    def place_ai_ship(self, ship_name, start_pos, orientation):
+        if self.ai_player is None:
+            return False
+
+        success = self.ai_player.place_ship(ship_name, self.fleet[ship_name], start_pos, orientation)
+        if success:
+            self._placed('ai', self.ai_player.grid.ships[-1:])
+        return success
+
+    def place_ai_ships_randomly(self):
+        if self.ai_player is None:
+            return False
+
+        return self._place_randomly('ai', self.ai_player)
+
+    def _place_randomly(self, side, player):
+        placed_before = len(player.grid.ships)
+        # Random tries can miss a layout that exists; the exhaustive search only fails when none does
+        success = player.place_ships_randomly() or player.place_ships_randomly(guaranteed=True)
+        # Ships placed before a failure stay on the board, so they are announced either way
+        self._placed(side, player.grid.ships[placed_before:])
+        return success
     
 
 
@@ -75,77 +118,137 @@ class GameController:
             return False
             
         self.current_turn = 'player'
+        self._publish(TurnChanged, 'player')
         return True
 
     def process_player_shot(self, position):
+        # Returns the ShotFired event, or None when the shot is not allowed
         if self.current_turn != 'player':
-            return {'valid': False}
+            return None
             
-        if self.ai_player.grid.get_cell_state(position) in ['hit', 'miss']:
-            return {'valid': False}
+        # Cells already shot and positions off the board are refused
+        if self.ai_player.grid.get_cell_state(position) not in ('empty', 'ship'):
+            return None
             
-        hit, sunk_ship = self.ai_player.receive_shot(position)
         self.stats['total_shots'] += 1
-        if hit:
+        shot = self._resolve_shot('player', self.ai_player, position)
+        if shot.hit:
             self.stats['hits'] += 1
         else:
             self.stats['misses'] += 1
-            
-        result = {
-            'valid': True,
-            'hit': hit,
-            'sunk': sunk_ship is not None,
-            'ship_name': sunk_ship.name if sunk_ship else None,
-            'game_over': False
-        }
+        return self._finish_turn(shot, 'ai')
         
-        if hit and self.ai_player.all_ships_sunk():
-            self.end_game()
-            result['game_over'] = True
-            result['winner'] = 'player'
-        else:
-            self.current_turn = 'ai'
-            
-        return result
-        
-    def process_ai_turn(self):
+    def process_ai_turn(self, position=None):
+        # position is the AI's move when it was already chosen elsewhere (e.g. a worker thread)
         if self.current_turn != 'ai':
-            return {'valid': False}
-        
-        position = self.ai_player.get_shot_position()
-        
-        hit, sunk_ship = self.player.receive_shot(position)
+            return None
         
-        result = {
-            'valid': True,
-            'position': position,
-            'hit': hit,
-            'sunk': sunk_ship is not None,
-            'ship_name': sunk_ship.name if sunk_ship else None,
-            'game_over': False
-        }
+        if position is None:
+            position = self.ai_player.get_shot_position()
+        elif self.player.grid.get_cell_state(position) not in ('empty', 'ship'):
+            return None
         
-        if hit and self.player.all_ships_sunk():
+        shot = self._resolve_shot('ai', self.player, position)
+        return self._finish_turn(shot, 'player')
+
+    def _resolve_shot(self, side, target, position):
+        shooter = self.player if side == 'player' else self.ai_player
+        hit, sunk_ship = target.receive_shot(position)
+        shooter.record_shot_result(position, hit, sunk_ship)
+        ship = target.grid._ship_at(*position) if hit else None
+        return ShotFired(side, position, hit, ship, sunk_ship is not None, hit and target.all_ships_sunk())
+
+    def _finish_turn(self, shot, next_turn):
+        events = self.events
+        if events.wants(ShotFired):
+            events.publish(shot)
+        if shot.sunk and events.wants(ShipSunk):
+            events.publish(ShipSunk(shot.side, shot.ship))
+
+        if shot.game_over:
             self.end_game()
-            result['game_over'] = True
-            result['winner'] = 'ai'
+            self._publish(GameOver, shot.side)
+            if events.batched:
+                events.flush()
         else:
-            self.current_turn = 'player'
-        
-        return result
+            self.current_turn = next_turn
+            self._publish(TurnChanged, next_turn)
+        return shot
+
+    ## events
+    def _publish(self, event_type, *args):
+        # Builds the event only when someone listens for it
+        if self.events.wants(event_type):
+            self.events.publish(event_type(*args))
+
+    def _placed(self, side, ships):
+        if self.events.wants(ShipPlaced):
+            for ship in ships:
+                self.events.publish(ShipPlaced(side, ship))
 
     def end_game(self):
         self.game_over = True
         self.current_turn = None
         self.selected_position = None
+        self._publish(TurnChanged, None)
 
     def get_cell_state(self, is_player_grid, position):
         grid = self.player.grid if is_player_grid else self.ai_player.grid
         return grid.get_cell_state(position)
 
-    def set_main_window(self, main_window):
-        self.main_window = main_window
-        main_window.game_controller = self
-
     def get_current_turn(self):
-        return self.current_turn
\ No newline at end of file
+        return self.current_turn
+
+    def to_dict(self):
+        return {
+            'grid_size': self.grid_size,
+            'fleet': [list(item) for item in self.fleet.items()],
+            'player_class': self.player_class.__name__,
+            'ai_player_class': self.ai_player_class.__name__,
+            'current_turn': self.current_turn,
+            'game_over': self.game_over,
+            'player_name': self.player_name,
+            'stats': dict(self.stats),
+            'player': self.player.to_dict() if self.player else None,
+            'ai_player': self.ai_player.to_dict() if self.ai_player else None
+        }
+
+    @classmethod
+    def from_dict(cls, data, grid_class=Grid):
+        controller = cls(player_class_by_name(data['ai_player_class']),
+                         player_class_by_name(data['player_class']),
+                         data['grid_size'], dict(data['fleet']), grid_class=grid_class)
+        controller.current_turn = data['current_turn']
+        controller.game_over = data['game_over']
+        controller.player_name = data.get('player_name', controller.player_name)
+        controller.stats.update(data['stats'])
+        if data['player'] is not None:
+            controller.player = controller.player_class.from_dict(data['player'], grid_class)
+            controller.ai_player = controller.ai_player_class.from_dict(data['ai_player'], grid_class)
+            controller.replay_observations()
+        return controller
+
+    def replay_observations(self):
+        # Tell each side what its past shots revealed, so restored strategies
+        # rebuild their knowledge; misses first, then every ship's hits with
+        # the sink reported on its last one
+        for shooter, target in ((self.player, self.ai_player), (self.ai_player, self.player)):
+            for position in target.grid.get_misses():
+                shooter.record_shot_result(position, False, None)
+            hits = target.grid.get_hits()
+            for ship in target.grid.ships:
+                ship_hits = [position for position in ship.get_positions() if position in hits]
+                for number, position in enumerate(ship_hits, 1):
+                    sunk = ship if number == len(ship_hits) and ship.is_sunk() else None
+                    shooter.record_shot_result(position, True, sunk)
+
+
+def player_class_by_name(name):
+    # Player and every subclass imported so far, looked up by class name
+    pending = [Player]
+    while pending:
+        player_class = pending.pop()
+        if player_class.__name__ == name:
+            return player_class
+        pending.extend(player_class.__subclasses__())
+    raise ValueError(f"Unknown player class {name!r}")
\ No newline at end of file
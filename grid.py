@@ -1,16 +1,72 @@
+from array import array
+from collections.abc import Set
 from ship import Ship, ShipOrientation
 
+## Boards bigger than this keep ships and shots in dicts keyed by (row, col) instead of flat arrays
+SPARSE_GRID_THRESHOLD = 100
+
+## Shot state of a cell
+MISS, HIT = 1, 2
+
+class ShotView(Set):
+
+    ## Live, read-only set of the shot cells in some states, iterated in the order the
+    ## shots landed. Nothing is copied, so it always shows the grid as it is now; take
+    ## list(view) to keep a snapshot.
+    __slots__ = ('_grid', '_states')
+
+    def __init__(self, grid, states):
+
+        self._grid = grid
+        self._states = states
+
+    @classmethod
+    def _from_iterable(cls, cells):
+
+        ## results of &, |, - and ^ are plain sets
+        return set(cells)
+
+    def __contains__(self, pos):
+
+        if not isinstance(pos, tuple) or len(pos) != 2 or not self._grid._is_within_grid(pos):
+            return False
+        return self._grid._shot_state(pos[0], pos[1]) in self._states
+
+    def __len__(self):
+
+        return self._grid._count_with_state(self._states)
+
+    def __iter__(self):
+
+        return self._grid._iter_cells_with_state(self._states)
+
+    def __repr__(self):
+
+        return f"{type(self).__name__}({sorted(self)!r})"
+
 class Grid:
     
-    
-    def __init__(self):
+    __slots__ = ('size', 'sparse', 'grid', 'ships', 'shot_states', 'ships_afloat', 'shot_counts',
+                 'shot_log', 'shots', 'hits', 'misses')
+
+    def __init__(self, size=10):
         
-        self.size = 10  
-        self.grid = [[None for _ in range(self.size)] for _ in range(self.size)] ## 2D list
+        self.size = size
+        self.sparse = size > SPARSE_GRID_THRESHOLD
+        self.grid = self._empty_cells() ## ship number + 1 per cell (0 is water), row-major
         self.ships = []          
-        self.shots = set()    
-        self.hits = set()     
-        self.misses = set()   
+        self.shot_states = self._empty_shots() ## MISS or HIT per cell that was shot at
+        self.ships_afloat = 0 ## kept up to date by place_ship and receive_shot
+        self.shot_counts = [0, 0, 0] ## cells per shot state, indexed by MISS and HIT
+        self.shot_log = array('Q') ## cell number * 4 + shot state per shot, in the order they landed
+        self._make_views()
+
+    def _make_views(self):
+
+        ## read-only live views of the shot cells
+        self.shots = ShotView(self, (MISS, HIT))
+        self.hits = ShotView(self, (HIT,))
+        self.misses = ShotView(self, (MISS,))
 
     def place_ship(self, ship, start_pos, orientation):
         
@@ -24,15 +80,61 @@ class Grid:
         if not self._is_valid_placement(positions):
             return False
 
-        ship.position = positions
+        ship.position = tuple(positions)
         ship.orientation = ShipOrientation.HORIZONTAL if orientation == 'horizontal' else ShipOrientation.VERTICAL
         self.ships.append(ship)
-        
-        for pos in positions:
-            self.grid[pos[0]][pos[1]] = ship
-            
+        self._store_ship(ship)
+        self.ships_afloat += 1
         return True
 
+    def _empty_cells(self):
+
+        if self.sparse:
+            return {}
+        return array('H', bytes(2 * self.size * self.size))
+
+    def _empty_shots(self):
+
+        if self.sparse:
+            return {}
+        return bytearray(self.size * self.size)
+
+    def _store_ship(self, ship):
+
+        ## called right after the ship is appended, so its number is len(self.ships)
+        number = len(self.ships)
+        for row, col in ship.position:
+            if self.sparse:
+                self.grid[(row, col)] = number
+            else:
+                self.grid[row * self.size + col] = number
+
+    def _ship_at(self, row, col):
+
+        if self.sparse:
+            number = self.grid.get((row, col), 0)
+        else:
+            number = self.grid[row * self.size + col]
+        return self.ships[number - 1] if number else None
+
+    def _shot_state(self, row, col):
+
+        if self.sparse:
+            return self.shot_states.get((row, col), 0)
+        return self.shot_states[row * self.size + col]
+
+    def _count_with_state(self, states):
+
+        return sum(self.shot_counts[state] for state in states)
+
+    def _iter_cells_with_state(self, states):
+
+        ## walks the shots fired, not the board
+        size = self.size
+        for entry in self.shot_log:
+            if (entry & 3) in states:
+                yield divmod(entry >> 2, size)
+
     def _calculate_ship_positions(self, size, start_pos, orientation):
         
         if not self._is_within_grid(start_pos):
@@ -61,31 +163,41 @@ class Grid:
 
     def receive_shot(self, pos):
         
-        if not self._is_within_grid(pos) or pos in self.shots:
+        if not self._is_within_grid(pos):
             return False, None
-
-        self.shots.add(pos)
         row, col = pos
-        ship = self.grid[row][col]
+        if self._shot_state(row, col):
+            return False, None
+
+        ship = self._ship_at(row, col)
+        state = MISS if ship is None else HIT
+        if self.sparse:
+            self.shot_states[(row, col)] = state
+        else:
+            self.shot_states[row * self.size + col] = state
+        self.shot_counts[state] += 1
+        self.shot_log.append((row * self.size + col) << 2 | state)
 
         if ship is None:
-            self.misses.add(pos)
             return False, None
 
-        self.hits.add(pos)
         ship.take_hit(pos)
-        return True, ship if ship.is_sunk() else None
+        sunk = ship if ship.is_sunk() else None
+        if sunk is not None:
+            self.ships_afloat -= 1
+        return True, sunk
 
     def get_cell_state(self, pos):
         
         if not self._is_within_grid(pos):
             return 'invalid'
             
-        if pos in self.hits:
+        state = self._shot_state(pos[0], pos[1])
+        if state == HIT:
             return 'hit'
-        if pos in self.misses:
+        if state == MISS:
             return 'miss'
-        if self.grid[pos[0]][pos[1]] is not None:
+        if self._ship_at(pos[0], pos[1]) is not None:
             return 'ship'
         return 'empty'
 
@@ -96,7 +208,7 @@ class Grid:
                 for j in range(-1, 2):
                     adj_pos = (row + i, col + j)
                     if (self._is_within_grid(adj_pos) and 
-                        self.grid[adj_pos[0]][adj_pos[1]] is not None):
+                        self._ship_at(adj_pos[0], adj_pos[1]) is not None):
                         return False
         return True
 
@@ -106,7 +218,7 @@ class Grid:
 
     def all_ships_sunk(self):
         
-        return all(ship.is_sunk() for ship in self.ships)
+        return self.ships_afloat == 0
 
     def get_all_ship_positions(self):
         
@@ -115,25 +227,27 @@ class Grid:
             positions.update(ship.get_positions())
         return positions
 
+    ## shots, hits and misses are ShotViews: live and read-only, never copied
     def get_shots_fired(self):
         
-        return self.shots.copy()
+        return self.shots
 
     def get_hits(self):
         
-        return self.hits.copy()
+        return self.hits
 
     def get_misses(self):
         
-        return self.misses.copy()
+        return self.misses
 
     def clear(self):
         
-        self.grid = [[None for _ in range(self.size)] for _ in range(self.size)]
+        self.grid = self._empty_cells()
+        self.shot_states = self._empty_shots()
+        self.shot_counts = [0, 0, 0]
+        self.shot_log = array('Q')
         self.ships.clear()
-        self.shots.clear()
-        self.hits.clear()
-        self.misses.clear()
+        self.ships_afloat = 0
 
     def to_dict(self):
         
@@ -145,26 +259,17 @@ class Grid:
             'misses': list(self.misses)
         }
 
-    
+    @classmethod
     def from_dict(cls, data):
         
+        ## ships go back through place_ship and shots through receive_shot,
+        ## so every storage backend rebuilds its own state and ship damage
         grid = cls(data['size'])
-        grid.shots = set(data['shots'])
-        grid.hits = set(data['hits'])
-        grid.misses = set(data['misses'])
-        
         for ship_data in data['ships']:
             ship = Ship.from_dict(ship_data)
-            grid.ships.append(ship)
-            for pos in ship.position:
-                grid.grid[pos[0]][pos[1]] = ship
-                
-        return grid
+            grid.place_ship(Ship(ship.name, ship.size), min(ship.position), ship.orientation.value)
 
-
-## DONT REMOVE CAUSES THE PLAYER GRID TILES TO DISAPEAR AFTER HIT
-grid = Grid()  
-ship = Ship("Battleship", 4)  
-success = grid.place_ship(ship, (0, 0), "horizontal")  
-hit, sunk_ship = grid.receive_shot((0, 0))  
-state = grid.get_cell_state((0, 0))  
\ No newline at end of file
+        for pos in data['shots']:
+            grid.receive_shot(tuple(pos))
+                
+        return grid
\ No newline at end of file
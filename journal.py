@@ -0,0 +1,223 @@
+import mmap
+import os
+import struct
+from collections import namedtuple
+
+from events import GameOver, GameStarted, ShipPlaced, ShotFired
+from ship import ShipOrientation
+
+## File layout: a 16 byte header (magic, version, record size) followed by
+## fixed 18 byte records: game (I), seq (I), kind (B), side (B), row (H),
+## col (H), value (B), a pad byte and ship (H). Game ids only grow, so a game's
+## records can be found by binary search.
+MAGIC = b'BSJ1'
+VERSION = 2
+HEADER = struct.Struct('<4sHH8x')
+RECORD = struct.Struct('<IIBBHHBxH')
+
+GAME_START, PLACEMENT, SHOT, GAME_OVER = range(4)
+SIDES = ('player', 'ai')
+MISS, HIT, SUNK = range(3)
+NO_SHIP = 0xFFFF
+
+## GAME_START: row is the board size, col the fleet size
+## PLACEMENT:  side owns the ship, value is 1 for vertical
+## SHOT:       side fired, value is MISS, HIT or SUNK, ship is the ship struck
+## GAME_OVER:  side won
+JournalEvent = namedtuple('JournalEvent', ['game', 'seq', 'kind', 'side', 'row', 'col', 'value', 'ship'])
+
+
+class GameJournal:
+    ## Append-only writer; records are buffered and written in blocks
+
+    def __init__(self, path, buffer_records=4096):
+
+        self.path = path
+        self.buffer_records = buffer_records
+        self._buffer = []
+        self._seq = 0
+        self.game = None
+        self._next_game = 0
+        self._fleet_index = {}
+
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        has_header = size >= HEADER.size
+        if size:
+            with JournalReader(path) as reader:
+                if len(reader):
+                    self._next_game = reader[-1].game + 1
+            ## a record cut short by a crash would throw every later record out of line,
+            ## and a header cut short is written again
+            whole = HEADER.size + len(reader) * RECORD.size if has_header else 0
+            if size > whole:
+                os.truncate(path, whole)
+        self._file = open(path, 'ab')
+        if not has_header:
+            self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+
+    def subscribe(self, events):
+
+        ## records a GameController's games from its event bus
+        events.subscribe(GameStarted, self._on_game_started)
+        events.subscribe(ShipPlaced, self._on_ship_placed)
+        events.subscribe(ShotFired, self._on_shot_fired)
+        events.subscribe(GameOver, self._on_game_over)
+
+    def _on_game_started(self, event):
+
+        if len(event.fleet) >= NO_SHIP:
+            raise ValueError(f"A journal holds fleets of up to {NO_SHIP - 1} ships")
+        self._fleet_index = {name: number for number, name in enumerate(event.fleet)}
+        self.begin_game(event.grid_size, len(event.fleet))
+
+    def _on_ship_placed(self, event):
+
+        ship = event.ship
+        self.record_placement(SIDES.index(event.side), self._fleet_index[ship.name], min(ship.position),
+                              ship.orientation is ShipOrientation.VERTICAL)
+
+    def _on_shot_fired(self, event):
+
+        if not event.hit:
+            self.record_shot(SIDES.index(event.side), event.position, MISS)
+        else:
+            self.record_shot(SIDES.index(event.side), event.position, SUNK if event.sunk else HIT,
+                             self._fleet_index[event.ship.name])
+
+    def _on_game_over(self, event):
+
+        self.record_game_over(SIDES.index(event.winner))
+
+    def begin_game(self, grid_size, fleet_size):
+
+        self.game = self._next_game
+        self._next_game += 1
+        self._seq = 0
+        self._append(GAME_START, 0, grid_size, fleet_size, 0, NO_SHIP)
+        return self.game
+
+    def record_placement(self, side, ship_index, start_pos, vertical):
+
+        self._append(PLACEMENT, side, start_pos[0], start_pos[1], vertical, ship_index)
+
+    def record_shot(self, side, position, outcome, ship_index=NO_SHIP):
+
+        self._append(SHOT, side, position[0], position[1], outcome, ship_index)
+
+    def record_game_over(self, winner_side):
+
+        self._append(GAME_OVER, winner_side, 0, 0, 0, NO_SHIP)
+
+    def _append(self, kind, side, row, col, value, ship):
+
+        self._buffer.append(RECORD.pack(self.game, self._seq, kind, side, row, col, value, ship))
+        self._seq += 1
+        if len(self._buffer) >= self.buffer_records:
+            self.flush()
+
+    def flush(self):
+
+        if self._buffer:
+            self._file.write(b''.join(self._buffer))
+            self._buffer.clear()
+        self._file.flush()
+
+    def close(self):
+
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, *exc_info):
+
+        self.close()
+
+
+class JournalReader:
+    ## Memory-mapped, random-access view of a journal file
+
+    def __init__(self, path):
+
+        self._file = open(path, 'rb')
+        self._map = None
+        self._count = 0
+        size = os.fstat(self._file.fileno()).st_size
+        if size < HEADER.size:
+            ## created by a GameJournal that has not flushed yet, or whose header
+            ## write was cut short; either way it holds no records
+            if HEADER.pack(MAGIC, VERSION, RECORD.size).startswith(self._file.read()):
+                return
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} game journal")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} game journal")
+        self._count = (len(self._map) - HEADER.size) // RECORD.size
+
+    def __len__(self):
+
+        return self._count
+
+    def __getitem__(self, index):
+
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("journal index out of range")
+        return JournalEvent._make(RECORD.unpack_from(self._map, HEADER.size + index * RECORD.size))
+
+    def __iter__(self):
+
+        return self.events()
+
+    def events(self, start=0, stop=None):
+
+        ## decodes straight out of the mapping, nothing is copied up front
+        stop = self._count if stop is None else min(stop, self._count)
+        if start >= stop:
+            return
+        view = memoryview(self._map)[HEADER.size + start * RECORD.size:HEADER.size + stop * RECORD.size]
+        try:
+            for fields in RECORD.iter_unpack(view):
+                yield JournalEvent._make(fields)
+        finally:
+            view.release()
+
+    def find_game(self, game):
+
+        ## index of the game's first record, or len(self) when it is not in the file
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self[middle].game < game:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def game_events(self, game):
+
+        for event in self.events(self.find_game(game)):
+            if event.game != game:
+                return
+            yield event
+
+    def close(self):
+
+        if self._map is not None and not self._map.closed:
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, *exc_info):
+
+        self.close()
@@ -1,23 +1,29 @@
+import argparse
 import sys
-from PyQt6.QtWidgets import QApplication
-from main_window import MainWindow
-from start_screen import StartScreen
 from game_controller import GameController
+from stats_store import StatsStore
 
 ## Main game class
 class BattleshipGame:
 
-    def __init__(self):
+    def __init__(self, grid_size=10, argv=None, ai_delay=1000, player_name='Player', stats_path=None):
+
+        ## Qt and the screens are only imported here, so importing the game core never loads them
+        from PyQt6.QtWidgets import QApplication
+        from main_window import MainWindow
+        from start_screen import StartScreen
 
         ## PyQt
-        self.app = QApplication(sys.argv)
+        self.app = QApplication(argv if argv is not None else sys.argv)
         
         ## Creates object from the game controller class
-        self.game_controller = GameController()
+        self.game_controller = GameController(grid_size=grid_size, player_name=player_name)
+
+        ## Finished games are kept across runs when a statistics file is given
+        self.stats_store = StatsStore(stats_path, batch_size=1) if stats_path else None
         
         ## Creates the main window for the game
-        self.main_window = MainWindow(self.game_controller)
-        self.game_controller.set_main_window(self.main_window)
+        self.main_window = MainWindow(self.game_controller, ai_delay, self.stats_store)
         
         ## Start screen on the mai widnow
         self.start_screen = StartScreen(self.main_window)
@@ -25,13 +31,25 @@ class BattleshipGame:
     def run(self):
 
         self.start_screen.show()
-        return self.app.exec()
+        try:
+            return self.app.exec()
+        finally:
+            if self.stats_store is not None:
+                self.stats_store.close()
 
 ## True when this file is run
 if __name__ == "__main__":
 
+    ## Board size comes from the command line, everything else goes to Qt
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=10)
+    parser.add_argument('--ai-delay', type=int, default=1000, help="minimum ms before the AI's shot is shown")
+    parser.add_argument('--name', default='Player', help="player name shown and recorded in the statistics")
+    parser.add_argument('--stats', help="SQLite file keeping statistics across games")
+    options, qt_args = parser.parse_known_args()
+
     ## Creates the game object from the game class
-    game = BattleshipGame()
+    game = BattleshipGame(options.size, sys.argv[:1] + qt_args, options.ai_delay, options.name, options.stats)
     
     ## Run game
     sys.exit(game.run())
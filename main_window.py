@@ -1,25 +1,42 @@
-from grid import Grid
-from instructions_screen import InstructionsScreen
+import threading
+import time
+
+from board_widget import BoardWidget
+from events import ShipPlaced, ShotFired
 
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-                             QPushButton, QLabel, QGridLayout, QMessageBox)
-from PyQt6.QtCore import Qt, QTimer
+                             QPushButton, QLabel, QMessageBox)
+from PyQt6.QtCore import Qt, QThreadPool, QTimer, pyqtSignal
 
 ## Universal Ui elements colors
 WATER_COLOR = '#3398fa'
 SHIP_COLOR = '#808080'
 HIT_COLOR = '#FF0000'
 MISS_COLOR = '#FFFFFF'
+CELL_COLORS = {'empty': WATER_COLOR, 'ship': SHIP_COLOR, 'hit': HIT_COLOR, 'miss': MISS_COLOR}
 
 class MainWindow(QMainWindow):
+    ai_move_ready = pyqtSignal(int, object)  # AI turn number, (position or error, time the turn started)
 
-    def __init__(self, game_controller):
+    def __init__(self, game_controller, ai_delay=1000, stats_store=None):
         super().__init__()
 
         self.game_controller = game_controller
-        self.instructions_window = InstructionsScreen()
-        self.player_grid_buttons = []  # Array storing the player's grid buttons
-        self.ai_grid_buttons = []  # Array storing the opponent's grid buttons
+        self.stats_store = stats_store  # Optional StatsStore recording every finished game
+        if stats_store is not None:
+            stats_store.subscribe(game_controller.events, game_controller.player_name, 'human',
+                                  game_controller.ai_player_class.__name__)
+        self.ai_delay = ai_delay  # Minimum time in ms before the AI's shot is shown
+        self.ai_turn = 0  # Bumped for every AI turn, and to cancel the one in flight
+        self.ai_cancelled = threading.Event()  # Set to tell the worker of the turn in flight to stop
+        self.ai_move_ready.connect(self._on_ai_move_ready)
+
+        # Boards repaint from the controller's events, one cell at a time
+        game_controller.events.subscribe(ShipPlaced, self._on_ship_placed)
+        game_controller.events.subscribe(ShotFired, self._on_shot_fired)
+        self.instructions_window = None  # Built the first time it is shown
+        self.player_board = None  # Board widget showing the player's fleet
+        self.ai_board = None  # Board widget showing the opponent's waters
         self.selected_ship = None  # The ship currently assigned to the position
         self.selected_orientation = 'horizontal'  # Ship's orientation (horizontal/vertical)
         self.selected_attack_pos = None  # Initialize selected_attack_pos
@@ -55,49 +72,21 @@ class MainWindow(QMainWindow):
         title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(title_label)
 
-        # Create the grid
-        grid = QGridLayout()
-        grid.setSpacing(1)  # Set the spacing between cells
-
-        # Get the grid size
-        grid_size = Grid().size
-
-        grid_all_buttons = []  # Array to store buttons
-
-        # Create grid buttons
-        for row in range(grid_size):
-            row_buttons = []  # Row of buttons
-            for col in range(grid_size):
-                # Create a new button
-                grid_button = QPushButton()
-                # Set the button size based on the grid size (max 600px)
-                button_size = min(40, 600 // grid_size)
-                grid_button.setFixedSize(button_size, button_size)
-                grid_button.setStyleSheet("background-color: #1E90FF;")
-
-                # Bind the appropriate event to the button according to the grid type
-                if not is_player:
-                    # Bind the attack event to the opponent's grid
-                    grid_button.clicked.connect(
-                        lambda checked, r=row, c=col: self.handle_attack(r, c))
-                else:
-                    # Bind the ship placement event to the player's grid
-                    grid_button.clicked.connect(
-                        lambda checked, r=row, c=col: self.handle_ship_placement(r, c))
-
-                # Add the button to the grid and the array
-                grid.addWidget(grid_button, row, col)
-                row_buttons.append(grid_button)
-            grid_all_buttons.append(row_buttons)
-
-        # Store the buttons in the appropriate variable
-        if is_player:
-            self.player_grid_buttons = grid_all_buttons
+        # Create the board, one widget that paints every cell itself
+        board = BoardWidget(self.game_controller.grid_size, CELL_COLORS)
+
+        # Bind the appropriate event to the board according to the grid type
+        if not is_player:
+            # Bind the attack event to the opponent's grid
+            board.cellClicked.connect(self.handle_attack)
+            self.ai_board = board
         else:
-            self.ai_grid_buttons = grid_all_buttons
+            # Bind the ship placement event to the player's grid
+            board.cellClicked.connect(self.handle_ship_placement)
+            self.player_board = board
 
-        # Add the grid to the main layout
-        layout.addLayout(grid)
+        # Add the board to the main layout
+        layout.addWidget(board, alignment=Qt.AlignmentFlag.AlignCenter)
         return layout
 
     def create_control_panel(self):
@@ -145,13 +134,7 @@ class MainWindow(QMainWindow):
 
         # Ship selection button
         self.ship_buttons = {}
-        if self.game_controller.player:
-            for ship_name, size in self.game_controller.player.remaining_ships:
-                btn = QPushButton(f"{ship_name} ({size} cells)")
-                btn.clicked.connect(lambda checked, name=ship_name: self.select_ship(name))
-                btn.setStyleSheet("background-color: #56307b; color: #f4f4f4; padding: 10px")
-                self.ship_buttons[ship_name] = btn
-                self.ship_placement_group.addWidget(btn)
+        self.create_ship_buttons()
 
         # Orientation change button
         self.orientation_btn = QPushButton("Rotate Ship (Horizontal)")
@@ -195,6 +178,20 @@ class MainWindow(QMainWindow):
 
         return layout
 
+    def create_ship_buttons(self):
+        # One button per ship in the controller's fleet, above the orientation button
+        for btn in self.ship_buttons.values():
+            self.ship_placement_group.removeWidget(btn)
+            btn.deleteLater()
+        self.ship_buttons = {}
+        self.ship_buttons_fleet = dict(self.game_controller.fleet)
+        for index, (ship_name, size) in enumerate(self.ship_buttons_fleet.items()):
+            btn = QPushButton(f"{ship_name} ({size} cells)")
+            btn.clicked.connect(lambda checked, name=ship_name: self.select_ship(name))
+            btn.setStyleSheet("background-color: #56307b; color: #f4f4f4; padding: 10px")
+            self.ship_buttons[ship_name] = btn
+            self.ship_placement_group.insertWidget(index, btn)
+
     def handle_ship_placement(self, row, col):
         # Check ship selection before attempting to place
         if not self.selected_ship:
@@ -203,8 +200,6 @@ class MainWindow(QMainWindow):
 
         # Attempt to place the ship at the specified location using the controller
         if self.game_controller.place_player_ship(self.selected_ship, (row, col), self.selected_orientation):
-            # Update the player grid view after successfully placing the ship
-            self.update_player_grid()
             # Disable the button of the placed ship
             self.ship_buttons[self.selected_ship].setEnabled(False)
             # Reset the selected ship
@@ -230,7 +225,6 @@ class MainWindow(QMainWindow):
 
     def random_ship_placement(self):
         if self.game_controller.place_player_ships_randomly():  
-            self.update_player_grid() 
             for btn in self.ship_buttons.values():  
                 btn.setEnabled(False)
             self.start_game()  # Start the game after placing ships
@@ -245,36 +239,8 @@ class MainWindow(QMainWindow):
         self._highlight_selected_cell(row, col)
 
     def _highlight_selected_cell(self, row, col):
-        # Reset all cells format to their original state
-        for r in range(len(self.ai_grid_buttons)):
-            for c in range(len(self.ai_grid_buttons[r])):
-                cell_state = self.game_controller.get_cell_state(False, (r, c))
-                if cell_state == 'hit':
-                    self.ai_grid_buttons[r][c].setStyleSheet(f"background-color: {HIT_COLOR};")
-                elif cell_state == 'miss':
-                    self.ai_grid_buttons[r][c].setStyleSheet(f"background-color: {MISS_COLOR};")
-                else:
-                    self.ai_grid_buttons[r][c].setStyleSheet(f"background-color: {WATER_COLOR};")
-
-        # Highlight the selected cell while keeping its original color
-        cell_state = self.game_controller.get_cell_state(False, (row, col))
-        base_color = {
-            'hit': HIT_COLOR,
-            'miss': MISS_COLOR,
-            'empty': WATER_COLOR,
-        }.get(cell_state, WATER_COLOR)
-
-        # Apply hover formatting while keeping its original color
-        self.ai_grid_buttons[row][col].setStyleSheet(f"""
-            QPushButton {{
-                background-color: {base_color};
-                border: 2px solid #e74c3c;
-            }}
-            QPushButton:hover {{
-                background-color: {base_color};
-                border: 3px solid #c0392b;
-            }}
-        """)
+        # The board draws the target border over the cell's own color
+        self.ai_board.set_highlight((row, col))
 
     def confirm_attack(self):
 
@@ -284,15 +250,11 @@ class MainWindow(QMainWindow):
         row, col = self.selected_attack_pos
         # Execute the attack
         result = self.game_controller.process_player_shot((row, col))
-        if not result['valid']:
+        if result is None:
             self.update_turn_status("Invalid attack!")
             return
-        # Refresh the AI grid
-        button = self.ai_grid_buttons[row][col]
-        if result['hit']:
-            button.setStyleSheet(f"background-color: {HIT_COLOR};")
-        else:
-            button.setStyleSheet(f"background-color: {MISS_COLOR};")
+        # The AI grid cell was repainted by the shot event, only the target border goes
+        self.ai_board.set_highlight(None)
 
         # Disable the Fire button and remove the specified grid button
         self.fire_btn.setEnabled(False)
@@ -302,52 +264,93 @@ class MainWindow(QMainWindow):
         self.update_stats_display()
 
         # Check if the game is over
-        if result['game_over']:
-            self.game_over(result['winner'])
+        if result.game_over:
+            self.game_over(result.winner)
         else:
             self._disable_ai_grid()
             self.update_turn_status("AI Turn")
 
-            ## waits before running the ai turn
-            QTimer.singleShot(1000, self._execute_ai_turn)
+            ## the ai picks its move on a worker thread
+            self._start_ai_turn()
 
 
 
 
 
     ## AI STUFF #######
-    def _execute_ai_turn(self):
+    def _start_ai_turn(self):
+        self.ai_turn += 1
+        turn = self.ai_turn
+        cancelled = self.ai_cancelled = threading.Event()
+        ai_player = self.game_controller.ai_player
+        started = time.monotonic()
+
+        # Runs on the thread pool; the signal hands the move back to the GUI thread.
+        # A cancelled turn is skipped if it has not started, and never reported.
+        def choose_move():
+            if cancelled.is_set():
+                return
+            try:
+                move = ai_player.get_shot_position()
+            except Exception as error:
+                move = error
+            if not cancelled.is_set():
+                self.ai_move_ready.emit(turn, (move, started))
+
+        QThreadPool.globalInstance().start(choose_move)
+
+    def cancel_ai_turn(self):
+        # Moves and timers from the cancelled turn are ignored when they arrive
+        self.ai_turn += 1
+        self.ai_cancelled.set()
+
+    def _on_ai_move_ready(self, turn, result):
+        if turn != self.ai_turn:
+            return
+        move, started = result
+        if isinstance(move, Exception):
+            # An exception escaping a slot would abort the application
+            self.update_turn_status("The AI could not choose a move")
+            QMessageBox.critical(self, "AI Error", f"The AI could not choose a move:\n{move}")
+            return
+
+        ## waits out the rest of the display delay before showing the shot
+        remaining = self.ai_delay - int((time.monotonic() - started) * 1000)
+        QTimer.singleShot(max(0, remaining), lambda: self._execute_ai_turn(turn, move))
+
+    def _execute_ai_turn(self, turn, position):
+        if turn != self.ai_turn:
+            return
+
         # Process AI turn and store result
-        result = self.game_controller.process_ai_turn()
+        result = self.game_controller.process_ai_turn(position)
 
         # Validate attack
-        if not result['valid']:
+        if result is None:
             return
 
-        # Get attack coordinates and target cell button
-        row, col = result['position']
-        button = self.player_grid_buttons[row][col]
-
-        # Process attack result and update interface
-        if result['hit']:
-            button.setStyleSheet(f"background-color: {HIT_COLOR};")
+        # Update interface, the shot event already repainted the cell
+        if result.hit:
             message = "AI Hit!"
-            if result['sunk']:
-                message += f" AI sunk your {result['ship_name']}!"
+            if result.sunk:
+                message += f" AI sunk your {result.ship_name}!"
         else:
-            button.setStyleSheet(f"background-color: {MISS_COLOR};")
             message = "AI Missed!"
 
         self.update_turn_status(message)
         self.update_stats_display()
 
-        if result['game_over']:
-            self.game_over(result['winner'])
+        if result.game_over:
+            self.game_over(result.winner)
         else:
             self._enable_ai_grid()
 
-            ## waits before chaning the turn label
-            QTimer.singleShot(1000, lambda: self.update_turn_status("Your turn!"))
+            ## waits before chaning the turn label, unless the player has moved on
+            QTimer.singleShot(self.ai_delay, lambda: self._show_your_turn(turn))
+
+    def _show_your_turn(self, turn):
+        if turn == self.ai_turn and self.game_controller.current_turn == 'player':
+            self.update_turn_status("Your turn!")
 
     def _disable_ai_grid(self):
         self.set_ai_grid_enabled(False)
@@ -356,38 +359,23 @@ class MainWindow(QMainWindow):
         self.set_ai_grid_enabled(True)
 
     def set_ai_grid_enabled(self, enabled):
-        for row in self.ai_grid_buttons:
-            for button in row:
-                button.setEnabled(enabled)
+        self.ai_board.setEnabled(enabled)
 
                 
 
 
-    def update_player_grid(self):
-        grid_size = self.game_controller.grid_size
-        # Update each cell in the grid only if its state changes
-        for row in range(grid_size):
-            for col in range(grid_size):
-                # Get the cell state from the controller
-                state = self.game_controller.get_cell_state(True, (row, col))
-                # Get the cell button from the array
-                button = self.player_grid_buttons[row][col]
-                # Determine the new style based on the state
-                new_style = ""
-                if state == 'ship':
-                    new_style = f"background-color: {SHIP_COLOR};"
-                elif state == 'hit':
-                    new_style = f"background-color: {HIT_COLOR};"
-                elif state == 'miss':
-                    new_style = f"background-color: {MISS_COLOR};"
-                else:
-                    new_style = f"background-color: {WATER_COLOR};"
-
-                # Update style only if it's different
-                if button.styleSheet() != new_style:
-                    button.setStyleSheet(new_style)
+    def _on_ship_placed(self, event):
+        # Only the player's own ships are drawn, the enemy's stay hidden
+        if event.side == 'player':
+            for position in event.ship.position:
+                self.player_board.set_cell(position, 'ship')
+
+    def _on_shot_fired(self, event):
+        board = self.ai_board if event.side == 'player' else self.player_board
+        board.set_cell(event.position, 'hit' if event.hit else 'miss')
 
     def start_new_game(self):
+        self.cancel_ai_turn()
         self.game_controller.start_new_game()
         self.reset_ui()
         self.update_turn_status("Place your ships!")
@@ -407,27 +395,23 @@ class MainWindow(QMainWindow):
 
     def reset_ui(self):
         """Reset the UI for a new game"""
-        # Reset UI to start a new game
-
-        # Create a new center widget and set it as the center widget
-        central_widget = QWidget()
-        self.setCentralWidget(central_widget)
-        main_layout = QHBoxLayout(central_widget)
+        # The widgets built in init_ui are reused, only their state is reset
 
-        # Create grid sections for player and AI with new size
-        player_section = self.create_grid_section("Your Fleet", is_player=True)
-        ai_section = self.create_grid_section("Enemy Waters", is_player=False)
-
-        # Create a control panel
-        control_panel = self.create_control_panel()
+        # Clear both boards, resizing them if the board size changed
+        grid_size = self.game_controller.grid_size
+        self.player_board.reset(grid_size)
+        self.ai_board.reset(grid_size)
+        self._enable_ai_grid()
 
-        # Add sections to the master layout
-        main_layout.addLayout(player_section)
-        main_layout.addLayout(control_panel)
-        main_layout.addLayout(ai_section)
+        # Ship buttons are only rebuilt when the fleet changed
+        if self.ship_buttons_fleet != self.game_controller.fleet:
+            self.create_ship_buttons()
+        for btn in self.ship_buttons.values():
+            btn.setEnabled(True)
 
         # Reset other UI elements
         self.orientation_btn.setEnabled(True)  # Enable direction button
+        self.orientation_btn.setText("Rotate Ship (Horizontal)")
         self.selected_ship = None  # Reset the selected ship
         self.selected_orientation = 'horizontal'  # Reset the selected direction
         self.update_turn_status("Place your ships!")  # Update game status
@@ -436,11 +420,12 @@ class MainWindow(QMainWindow):
         if hasattr(self, 'selected_attack_pos'):
             delattr(self, 'selected_attack_pos')  # Remove the specified attack site if it exists.
         self.fire_btn.setEnabled(False)  # Disable attack button
+        self.update_stats_display()
 
     def update_stats_display(self):
         """Update game statistics display"""
         stats = self.game_controller.stats
-        player_name = getattr(self.game_controller, 'current_player_name', 'Unknown Player')
+        player_name = self.game_controller.player_name
 
         if stats['total_shots'] > 0:
             accuracy = (stats['hits'] / stats['total_shots']) * 100
@@ -456,6 +441,12 @@ class MainWindow(QMainWindow):
         - Misses: {stats['misses']}
         - Accuracy: {accuracy:.1f}%
         """
+        if self.stats_store is not None:
+            games, wins, rate = self.stats_store.win_rate(player_name=player_name)
+            stats_text += f"""All Games:
+        - Played: {games}
+        - Won: {wins} ({rate * 100:.1f}%)
+        """
         self.stats_label.setText(stats_text)
 
     def game_over(self, winner):
@@ -468,6 +459,9 @@ class MainWindow(QMainWindow):
         QMessageBox.information(self, 'Game Over', message)
 
     def show_instructions(self):
+        if self.instructions_window is None:
+            from instructions_screen import InstructionsScreen
+            self.instructions_window = InstructionsScreen()
         self.instructions_window.setWindowFlags(Qt.WindowType.Window)
         self.instructions_window.setWindowTitle("Game Instructions")
         self.instructions_window.showFullScreen()
@@ -476,4 +470,5 @@ class MainWindow(QMainWindow):
 
     # Hides the gameplay window to show the starting window
     def return_start_window(self):
+        self.cancel_ai_turn()
         self.hide()
\ No newline at end of file
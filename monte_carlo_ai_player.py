@@ -0,0 +1,221 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Tuple
+
+from density_ai_player import DensityAIPlayer
+from grid import Grid, SPARSE_GRID_THRESHOLD
+from placement_index import legal_placements
+from zobrist import EvaluationCache, ZobristView
+
+## one pool per worker count, started by the first move that needs it and shared by every
+## game; the lock keeps two threads (the server's) from both starting one
+_executors = {}
+_executors_lock = threading.Lock()
+## set in the processes of a pool that plays games, which must not start pools of their own
+_in_worker = False
+
+
+def mark_worker():
+
+    ## initializer for pools whose workers create players
+    global _in_worker
+    _in_worker = True
+
+
+@lru_cache(maxsize=64)
+def _placements(board_size, ship_size):
+
+    ## (cells, halo, cell numbers) of every placement, both orientations
+    placements = []
+    for orientation in ('horizontal', 'vertical'):
+        for placement in legal_placements(board_size, ship_size, orientation):
+            cells = placement.cells
+            numbers = []
+            while cells:
+                low = cells & -cells
+                numbers.append(low.bit_length() - 1)
+                cells ^= low
+            placements.append((placement.cells, placement.halo, tuple(numbers)))
+    return tuple(placements)
+
+
+def sample_layouts(board_size, ship_sizes, blocked, hits, samples, time_limit, seed):
+
+    ## Draws up to samples fleet layouts of ship_sizes that cover every cell in hits and
+    ## none in blocked (both bitboards), stopping early after time_limit seconds.
+    ## Returns (layouts accepted, weighted count of layouts covering each cell).
+    ## Ships are placed one at a time, each uniformly among the placements still free,
+    ## which favours some layouts over others; every layout is weighted by the inverse
+    ## of the chance of drawing it, so the counts estimate the uniform posterior.
+    rng = random.Random(seed)
+    deadline = time.perf_counter() + time_limit
+    counts = [0.0] * (board_size * board_size)
+
+    ## constraint propagation up front: a placement over blocked water is impossible, and
+    ## one lying entirely on hits would have been reported sunk
+    candidates = {}
+    for ship_size in set(ship_sizes):
+        candidates[ship_size] = [p for p in _placements(board_size, ship_size)
+                                 if not p[0] & blocked and p[0] & ~hits]
+        if not candidates[ship_size]:
+            return 0, counts
+    ## ships through a given hit cell, for the hits still to explain
+    through_hit = {}
+    for ship_size, placements in candidates.items():
+        for placement in placements:
+            if placement[0] & hits:
+                through_hit.setdefault(ship_size, []).append(placement)
+    ship_sizes = sorted(ship_sizes, reverse=True)
+
+    accepted = 0
+    for attempt in range(samples):
+        if attempt % 64 == 63 and time.perf_counter() > deadline:
+            break
+        unplaced = list(ship_sizes)
+        forbidden = 0  # cells and halos of the ships placed so far
+        covered = 0
+        layout = []
+        weight = 1.0
+
+        ## first explain the hits, one uncovered hit at a time; the ship through the
+        ## lowest uncovered hit is fixed by the layout, so each layout has one such path
+        while hits & ~covered:
+            target = hits & ~covered
+            target &= -target
+            options = [(ship_size, p) for ship_size in set(unplaced) for p in through_hit.get(ship_size, ())
+                       if p[0] & target and not p[0] & forbidden]
+            if not options:
+                break
+            ship_size, placement = rng.choice(options)
+            weight *= len(options)
+            unplaced.remove(ship_size)
+            forbidden |= placement[1]
+            covered |= placement[0]
+            layout.append(placement)
+        if hits & ~covered:
+            continue
+
+        ## then the rest of the fleet, largest first; ships of the same size can be
+        ## drawn in any order, so a layout has (ships of that size)! paths through here
+        previous, same = None, 0
+        for ship_size in unplaced:
+            placements = [p for p in candidates[ship_size] if not p[0] & forbidden]
+            if not placements:
+                break
+            placement = rng.choice(placements)
+            weight *= len(placements)
+            same = same + 1 if ship_size == previous else 1
+            weight /= same
+            previous = ship_size
+            forbidden |= placement[1]
+            layout.append(placement)
+        else:
+            accepted += 1
+            for placement in layout:
+                for number in placement[2]:
+                    counts[number] += weight
+    return accepted, counts
+
+
+class MonteCarloAIPlayer(DensityAIPlayer):
+    ## Samples whole fleet layouts that agree with every shot so far and fires at the
+    ## untried cell most of them put a ship on. Each move costs at most samples
+    ## layouts or time_limit seconds, split over workers processes; with nothing
+    ## sampled it falls back to the density heat map.
+    ## Evaluations are remembered by the canonical hash of the view they were made
+    ## from, so any rotation or reflection of a position seen before costs no sampling.
+    __slots__ = ('samples', 'time_limit', 'workers', 'view')
+    evaluations = EvaluationCache()
+
+    def __init__(self, grid=None, size=10, fleet=None, parity=False, samples=2000, time_limit=0.25,
+                 workers=None, grid_class=Grid):
+        super().__init__(grid, size, fleet, parity, grid_class)
+        self.samples = samples
+        self.time_limit = time_limit
+        ## inside a pool started with mark_worker the machine is already busy, so sample here
+        if workers is None:
+            workers = 1 if _in_worker else os.cpu_count() or 1
+        self.workers = workers
+        self.view = ZobristView(self.grid.size) if self.grid.size <= SPARSE_GRID_THRESHOLD else None
+
+    def get_shot_position(self) -> Tuple[int, int]:
+        position = self._opening_shot()
+        if position is not None:
+            self.tried[position[0] * self.grid.size + position[1]] = 1
+            return position
+
+        cells = self.best_cells()
+        if not cells:
+            return super().get_shot_position()
+
+        target = random.choice(cells)
+        self.tried[target] = 1
+        position = divmod(target, self.grid.size)
+        self._mark_attacked(position)
+        return position
+
+    def record_shot_result(self, position, hit, sunk_ship=None):
+        super().record_shot_result(position, hit, sunk_ship)
+        if self.view is not None:
+            self.view.shot(position, hit, sunk_ship)
+
+    def best_cells(self):
+        ## Untried cells with the highest posterior, from the cache when the position is known
+        tried = self.tried
+        key = None
+        if self.view is not None:
+            value, symmetry = self.view.canonical()
+            key = (self.grid.size, tuple(sorted(self.fleet.values())), self.samples, value)
+            cached = self.evaluations.get(key)
+            if cached is not None:
+                cells = [idx for idx in self.view.from_canonical(cached, symmetry) if not tried[idx]]
+                if cells:
+                    return cells
+
+        counts = self.posterior()
+        if counts is None:
+            return None
+        best = max(count for idx, count in enumerate(counts) if not tried[idx])
+        if not best:
+            return None
+        cells = [idx for idx, count in enumerate(counts) if count == best and not tried[idx]]
+        if key is not None:
+            self.evaluations.put(key, self.view.to_canonical(cells, symmetry))
+        return cells
+
+    def posterior(self):
+        ## How many sampled layouts cover each cell, or None when no layout was found
+        size = self.grid.size
+        blocked = 0
+        for idx, flag in enumerate(self.blocked):
+            if flag:
+                blocked |= 1 << idx
+        hits = 0
+        for idx in self.open_hits:
+            hits |= 1 << idx
+        ship_sizes = list(self.afloat.elements())
+        if not ship_sizes:
+            return None
+
+        if self.workers == 1:
+            accepted, counts = sample_layouts(size, ship_sizes, blocked, hits, self.samples, self.time_limit,
+                                              random.getrandbits(64))
+        else:
+            with _executors_lock:
+                executor = _executors.get(self.workers)
+                if executor is None:
+                    executor = _executors[self.workers] = ProcessPoolExecutor(self.workers)
+            share = -(-self.samples // self.workers)
+            futures = [executor.submit(sample_layouts, size, ship_sizes, blocked, hits, share, self.time_limit,
+                                       random.getrandbits(64))
+                       for _ in range(self.workers)]
+            accepted, counts = 0, [0.0] * (size * size)
+            for future in futures:
+                part_accepted, part_counts = future.result()
+                accepted += part_accepted
+                counts = [total + part for total, part in zip(counts, part_counts)]
+        return counts if accepted else None
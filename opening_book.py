@@ -0,0 +1,154 @@
+import argparse
+import mmap
+import os
+import random
+import struct
+
+from ship import SHIPS
+from zobrist import SYMMETRIES
+
+## File layout: a 16 byte header (magic, version, entry count) and a table of
+## 52 byte entries: strategy name (24s), board size (H), ship sizes (16s, zero
+## padded), offset (I) and length (I) of the entry's line, stored as little-endian
+## uint16 cell numbers (row * size + col).
+## A line is the shots a strategy fires on an empty board while every one of
+## them misses, so it is only followed until the first hit.
+MAGIC = b'BSO1'
+VERSION = 1
+HEADER = struct.Struct('<4sHI6x')
+ENTRY = struct.Struct('<24sH16sII2x')
+MAX_FLEET = 16
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'openings.bsob')
+
+
+def fleet_key(fleet):
+
+    ## ship names do not change the play, only the sizes do
+    sizes = sorted(fleet.values(), reverse=True)
+    if len(sizes) > MAX_FLEET or max(sizes, default=0) > 255:
+        return None
+    return bytes(sizes)
+
+
+class OpeningBook:
+    ## Memory-mapped book; lines are decoded the first time they are asked for
+
+    def __init__(self, path):
+
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} opening book")
+        self._entries = {}
+        for strategy, board_size, sizes, offset, length in ENTRY.iter_unpack(
+                self._map[HEADER.size:HEADER.size + count * ENTRY.size]):
+            self._entries[strategy.rstrip(b'\0').decode(), board_size, sizes.rstrip(b'\0')] = (offset, length)
+        self._lines = {}
+
+    def __len__(self):
+
+        return len(self._entries)
+
+    def line(self, strategy, board_size, fleet):
+
+        ## tuple of cell numbers, or None when the book has no line for this game
+        key = (strategy, board_size, fleet_key(fleet))
+        if key not in self._lines:
+            entry = self._entries.get(key)
+            self._lines[key] = (struct.unpack_from(f'<{entry[1]}H', self._map, entry[0])
+                                if entry is not None else None)
+        return self._lines[key]
+
+    def close(self):
+
+        self._map.close()
+        self._file.close()
+
+
+_books = {}
+
+
+def load_book(path=None):
+
+    ## opened on first use and shared by every player; None when there is no book file
+    path = path or os.environ.get('BATTLESHIP_OPENINGS', DEFAULT_PATH)
+    if path not in _books:
+        try:
+            _books[path] = OpeningBook(path)
+        except (OSError, ValueError):
+            _books[path] = None
+    return _books[path]
+
+
+def opening_line(strategy, board_size, fleet):
+
+    ## the book line in one of the board's 8 symmetries picked at random, so a
+    ## booked opening is not the same every game
+    book = load_book()
+    line = book.line(strategy, board_size, fleet) if book is not None else None
+    if not line:
+        return None
+    symmetry = random.choice(SYMMETRIES)
+    last = board_size - 1
+    cells = []
+    for number in line:
+        row, col = symmetry(*divmod(number, board_size), last)
+        cells.append(row * board_size + col)
+    return cells
+
+
+def build_line(player_class, board_size, fleet, moves, **options):
+
+    ## plays moves shots against an empty ocean and keeps the ones chosen
+    player = player_class(size=board_size, fleet=fleet, **options)
+    player.opening = False
+    line = []
+    for _ in range(min(moves, board_size * board_size)):
+        position = player.get_shot_position()
+        player.record_shot_result(position, False)
+        line.append(position[0] * board_size + position[1])
+    return line
+
+
+def write_book(path, lines):
+
+    ## lines maps (strategy, board size, fleet_key(fleet)) to a list of cell numbers
+    entries = []
+    payload = bytearray()
+    offset = HEADER.size + len(lines) * ENTRY.size
+    for (strategy, board_size, sizes), line in sorted(lines.items()):
+        entries.append(ENTRY.pack(strategy.encode(), board_size, sizes, offset + len(payload), len(line)))
+        payload += struct.pack(f'<{len(line)}H', *line)
+
+    with open(path, 'wb') as out:
+        out.write(HEADER.pack(MAGIC, VERSION, len(entries)))
+        out.write(b''.join(entries))
+        out.write(payload)
+
+
+if __name__ == "__main__":
+
+    from simulation import STRATEGIES
+
+    parser = argparse.ArgumentParser(description="Build the opening book AI players read their first shots from")
+    parser.add_argument('--strategies', nargs='+', choices=['density', 'montecarlo'],
+                        default=['density', 'montecarlo'])
+    parser.add_argument('--sizes', nargs='+', type=int, default=[10])
+    parser.add_argument('--moves', type=int, default=16, help="shots per line")
+    parser.add_argument('--samples', type=int, default=100000, help="layouts sampled per Monte Carlo move")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default=DEFAULT_PATH)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    lines = {}
+    for name in args.strategies:
+        player_class = STRATEGIES[name]
+        options = {'samples': args.samples, 'time_limit': float('inf')} if name == 'montecarlo' else {}
+        for size in args.sizes:
+            line = build_line(player_class, size, SHIPS, args.moves, **options)
+            lines[player_class.__name__, size, fleet_key(SHIPS)] = line
+            print(f"{player_class.__name__} {size}x{size}: {len(line)} shots")
+    write_book(args.out, lines)
@@ -0,0 +1,138 @@
+import random
+from collections import namedtuple
+from functools import lru_cache
+
+from bitboard_grid import placement_masks, rect_masks
+
+## cells and halo are bitboards in the layout used by BitboardGrid
+Placement = namedtuple('Placement', ['start', 'orientation', 'cells', 'halo'])
+
+
+@lru_cache(maxsize=64)
+def legal_placements(board_size, ship_size, orientation):
+
+    ## every in-bounds placement of one ship on an empty board
+    if orientation == 'horizontal':
+        max_row, max_col = board_size, board_size - ship_size + 1
+    else:
+        max_row, max_col = board_size - ship_size + 1, board_size
+
+    placements = []
+    for row in range(max_row):
+        for col in range(max_col):
+            cells, halo = placement_masks(board_size, ship_size, row, col, orientation)
+            placements.append(Placement((row, col), orientation, cells, halo))
+    return tuple(placements)
+
+
+def ship_halo(board_size, positions):
+
+    (row0, col0), (row1, col1) = min(positions), max(positions)
+    return rect_masks(board_size, row0, col0, row1, col1)[1]
+
+
+class PlacementIndex:
+    ## Legal placements left for each (ship size, orientation) given the ships placed so far
+
+    def __init__(self, board_size, ship_sizes, blocked=0):
+
+        self.board_size = board_size
+        self.blocked = blocked
+        self.candidates = {}
+        for size in set(ship_sizes):
+            for orientation in ('horizontal', 'vertical'):
+                self.candidates[size, orientation] = [
+                    p for p in legal_placements(board_size, size, orientation)
+                    if not p.cells & blocked
+                ]
+
+    def copy(self):
+
+        index = PlacementIndex.__new__(PlacementIndex)
+        index.board_size = self.board_size
+        index.blocked = self.blocked
+        index.candidates = {key: value.copy() for key, value in self.candidates.items()}
+        return index
+
+    def get_candidates(self, ship_size, orientation=None):
+
+        if orientation is not None:
+            return self.candidates[ship_size, orientation]
+        return self.candidates[ship_size, 'horizontal'] + self.candidates[ship_size, 'vertical']
+
+    def place(self, placement):
+
+        ## only placements that miss the new halo stay legal
+        halo = placement.halo
+        self.blocked |= halo
+        for key, placements in self.candidates.items():
+            self.candidates[key] = [p for p in placements if not p.cells & halo]
+
+    def random_placement(self, ship_size):
+
+        horizontal = self.candidates[ship_size, 'horizontal']
+        vertical = self.candidates[ship_size, 'vertical']
+        total = len(horizontal) + len(vertical)
+        if not total:
+            return None
+        pick = random.randrange(total)
+        return horizontal[pick] if pick < len(horizontal) else vertical[pick - len(horizontal)]
+
+
+def random_fleet_layout(board_size, fleet, blocked=0, guaranteed=False, attempts=50):
+
+    ## fleet is a list of (name, size); returns [(name, size, placement)] or None
+    fleet = list(fleet)
+    base = PlacementIndex(board_size, [size for _, size in fleet], blocked)
+
+    for _ in range(attempts):
+        index = base.copy()
+        layout = []
+        for name, size in fleet:
+            placement = index.random_placement(size)
+            if placement is None:
+                break
+            index.place(placement)
+            layout.append((name, size, placement))
+        else:
+            return layout
+
+    if guaranteed:
+        return _search_layout(board_size, fleet, blocked)
+    return None
+
+
+def _search_layout(board_size, fleet, blocked):
+
+    ## randomised backtracking, only gives up when the fleet cannot fit at all;
+    ## ships are tried largest first and equal ships take placements in rank
+    ## order so swapping two of them is never searched twice
+    fleet = sorted(fleet, key=lambda ship: ship[1], reverse=True)
+    ranked = {}
+    for _, size in fleet:
+        if size not in ranked:
+            options = list(legal_placements(board_size, size, 'horizontal'))
+            options += legal_placements(board_size, size, 'vertical')
+            random.shuffle(options)
+            ranked[size] = options
+
+    layout = []
+
+    def search(position, blocked, floor):
+        if position == len(fleet):
+            return True
+
+        name, size = fleet[position]
+        options = ranked[size]
+        same_size_next = position + 1 < len(fleet) and fleet[position + 1][1] == size
+        for rank in range(floor, len(options)):
+            placement = options[rank]
+            if placement.cells & blocked:
+                continue
+            layout.append((name, size, placement))
+            if search(position + 1, blocked | placement.halo, rank + 1 if same_size_next else 0):
+                return True
+            layout.pop()
+        return False
+
+    return layout if search(0, blocked, 0) else None
@@ -1,16 +1,23 @@
 import random
 from grid import Grid
+from placement_index import PlacementIndex, random_fleet_layout, ship_halo
 from ship import Ship
 from ship import SHIPS
 
+## Boards up to this size draw random fleets from a PlacementIndex
+INDEXED_BOARD_LIMIT = 32
+
 class Player:
     
-    
-    def __init__(self):
+    ## shots received live on the grid only
+    __slots__ = ('grid', 'fleet', 'remaining_ships', 'placed_ships')
+
+    def __init__(self, grid=None, size=10, fleet=None, grid_class=Grid):
        
-        self.grid = Grid()                 
-        self.shots = []         
-        self.remaining_ships = list(SHIPS.items())      
+        ## grid_class builds the board when no grid is given, e.g. BitboardGrid
+        self.grid = grid if grid is not None else grid_class(size)
+        self.fleet = dict(fleet or SHIPS)
+        self.remaining_ships = list(self.fleet.items())
         self.placed_ships = {}        
 
     def place_ship(self, ship_name, size, start_pos, 
@@ -32,74 +39,85 @@ class Player:
             
         return False
 
-    def place_ships_randomly(self):
-        
-        attempts = 0
-        max_attempts = 500  
-        original_remaining = self.remaining_ships.copy()
-        
-        while self.remaining_ships and attempts < max_attempts:
-            ship_name, size = self.remaining_ships[0]
-            orientation = random.choice(['horizontal', 'vertical'])
-            
-            
-            valid_positions = self._get_valid_positions(size, orientation)
-            if valid_positions:
-                pos = random.choice(valid_positions)
-                if self.place_ship(ship_name, size, pos, orientation):
-                    continue
-                    
-            attempts += 1
-            
-           
-            if attempts % 50 == 0:
-                self.grid.clear()
-                self.remaining_ships = original_remaining.copy()
-                self.placed_ships.clear()
-                attempts = 0
+    def place_ships_randomly(self, guaranteed=False):
         
-        
-        if self.remaining_ships:
-            self.remaining_ships = original_remaining
-            self.placed_ships.clear()
-            self.grid = Grid(self.grid.size)
+        ## enumerating every placement stops paying off on big, mostly empty boards
+        if self.grid.size > INDEXED_BOARD_LIMIT:
+            layout = self._sample_layout()
+            if layout is not None or not guaranteed:
+                return self._apply_layout(layout)
+
+        layout = random_fleet_layout(self.grid.size, self.remaining_ships,
+                                     self._blocked_cells(), guaranteed)
+        if layout is not None:
+            layout = [(ship_name, size, placement.start, placement.orientation)
+                      for ship_name, size, placement in layout]
+        return self._apply_layout(layout)
+
+    def _apply_layout(self, layout):
+
+        if layout is None:
             return False
-            
+        ## ships placed before a failure stay, the rest remain in remaining_ships
+        for ship_name, size, start_pos, orientation in layout:
+            if not self.place_ship(ship_name, size, start_pos, orientation):
+                return False
         return True
 
+    def _sample_layout(self, tries_per_ship=200):
+
+        ## random starts checked against the grid and the ships picked so far,
+        ## nothing is placed until the whole fleet has a spot
+        size = self.grid.size
+        taken = set()
+        layout = []
+        for ship_name, ship_size in self.remaining_ships:
+            for _ in range(tries_per_ship):
+                orientation = random.choice(['horizontal', 'vertical'])
+                if orientation == 'horizontal':
+                    start_pos = (random.randrange(size), random.randrange(size - ship_size + 1))
+                else:
+                    start_pos = (random.randrange(size - ship_size + 1), random.randrange(size))
+                positions = self.grid._calculate_ship_positions(ship_size, start_pos, orientation)
+                if (positions and self.grid._is_valid_placement(positions)
+                        and not any(pos in taken for pos in positions)):
+                    break
+            else:
+                return None
+
+            layout.append((ship_name, ship_size, start_pos, orientation))
+            for row, col in positions:
+                for i in range(-1, 2):
+                    for j in range(-1, 2):
+                        taken.add((row + i, col + j))
+        return layout
+
     def receive_shot(self, position):
        
-        self.shots.append(position)
         return self.grid.receive_shot(position)
 
+    def record_shot_result(self, position, hit, sunk_ship=None):
+
+        ## Outcome of a shot this player fired, strategies that learn override it
+        pass
+
     def all_ships_sunk(self):
         
-        return all(ship.is_sunk() for ship in self.placed_ships.values())
+        ## the grid keeps a running count of ships afloat
+        return self.grid.all_ships_sunk()
+
+    def _blocked_cells(self):
+
+        ## cells next to ships that are already on the board stay off limits
+        blocked = 0
+        for ship in self.grid.ships:
+            blocked |= ship_halo(self.grid.size, ship.position)
+        return blocked
 
     def _get_valid_positions(self, ship_size, orientation):
        
-       ## Holds all valid positions
-        valid_positions = []
-        grid_size = self.grid.size
-        
-        ## Allowes the ship to be placed in any row since its horizontal
-        if orientation == 'horizontal':
-            max_row = grid_size
-            max_col = grid_size - ship_size + 1
-
-        ## when the ship is vertical place it in any column
-        else:
-            max_row = grid_size - ship_size + 1
-            max_col = grid_size
-        
-       
-        for row in range(max_row):
-            for col in range(max_col):
-                positions = self.grid._calculate_ship_positions(ship_size, (row, col), orientation)
-                if positions and self.grid._is_valid_placement(positions):
-                    valid_positions.append((row, col))
-                    
-        return valid_positions
+        index = PlacementIndex(self.grid.size, [ship_size], self._blocked_cells())
+        return [placement.start for placement in index.get_candidates(ship_size, orientation)]
 
     
     def get_remaining_ships(self):
@@ -112,14 +130,35 @@ class Player:
             return self.placed_ships[ship_name].get_positions()
         return []
 
+    def to_dict(self):
+
+        return {
+            'fleet': [list(item) for item in self.fleet.items()],
+            'grid': self.grid.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, data, grid_class=Grid, **kwargs):
+
+        player = cls(grid_class.from_dict(data['grid']), fleet=dict(data['fleet']), **kwargs)
+        player._adopt_grid_ships()
+        return player
+
+    def _adopt_grid_ships(self):
+
+        ## placed and remaining ships follow from what is on the grid
+        self.placed_ships = {ship.name: ship for ship in self.grid.ships}
+        self.remaining_ships = [item for item in self.fleet.items() if item[0] not in self.placed_ships]
+
+    ## read-only live views of the grid's shots, see ShotView
     def get_shots_fired(self):
         
-        return self.shots.copy()
+        return self.grid.get_shots_fired()
 
     def get_hits(self):
         
-        return [pos for pos in self.shots if self.grid.get_cell_state(pos) == 'hit']
+        return self.grid.get_hits()
 
     def get_misses(self):
         
-        return [pos for pos in self.shots if self.grid.get_cell_state(pos) == 'miss']
\ No newline at end of file
+        return self.grid.get_misses()
\ No newline at end of file
@@ -0,0 +1,332 @@
+import argparse
+import asyncio
+import itertools
+import json
+
+from events import ShotFired
+from game_controller import GameController
+from player import Player
+from simulation import STRATEGIES
+
+## Newline-delimited JSON over TCP. Client messages:
+##   {"type": "new", "mode": "ai" or "human", "size": 10, "ai": "random", "density" or "montecarlo"}
+##   {"type": "join", "session": id}
+##   {"type": "place", "random": true}  or  {"type": "place", "ship": name, "row": r, "col": c,
+##                                          "orientation": "horizontal" or "vertical"}
+##   {"type": "shot", "row": r, "col": c}
+##   {"type": "leave"}
+## Seat 0 is the controller's player, seat 1 its AI seat, filled by the AI or a second human.
+## The server answers with "joined", "opponent_joined", "placed", "start", "shot",
+## "opponent_left" and "error" messages.
+MAX_GRID_SIZE = 100
+TURN_SEATS = {'player': 0, 'ai': 1}
+
+
+def encode(message):
+
+    return (json.dumps(message, separators=(',', ':')) + '\n').encode()
+
+
+class Connection:
+    ## One client: write takes encoded bytes and must not block
+
+    __slots__ = ('write', 'session', 'seat')
+
+    def __init__(self, write):
+
+        self.write = write
+        self.session = None
+        self.seat = None
+
+    def send(self, message):
+
+        self.write(encode(message))
+
+
+class Session:
+
+    __slots__ = ('id', 'controller', 'seats', 'vs_ai', 'started')
+
+    def __init__(self, session_id, controller, vs_ai):
+
+        self.id = session_id
+        self.controller = controller
+        self.seats = [None, None]
+        self.vs_ai = vs_ai
+        self.started = False
+
+    def broadcast(self, message):
+
+        data = encode(message)
+        for connection in self.seats:
+            if connection is not None:
+                connection.write(data)
+
+    def seat_player(self, seat):
+
+        return self.controller.player if seat == 0 else self.controller.ai_player
+
+
+class GameServer:
+    ## Hosts independent sessions; every move is checked by the session's GameController
+
+    def __init__(self):
+
+        self.sessions = {}
+        self._ids = itertools.count(1)
+        self._fits = {}  # board size -> whether the fleet has a layout on it
+        self._handlers = {
+            'new': self._on_new,
+            'join': self._on_join,
+            'place': self._on_place,
+            'shot': self._on_shot,
+            'leave': self._on_leave,
+        }
+
+    async def serve(self, host='127.0.0.1', port=8765):
+
+        server = await asyncio.start_server(self._handle_client, host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def _handle_client(self, reader, writer):
+
+        connection = Connection(writer.write)
+        try:
+            async for line in reader:
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    connection.send({'type': 'error', 'message': "Messages must be JSON"})
+                    continue
+                try:
+                    self.handle(connection, message)
+                except Exception:
+                    ## a bug in one handler must not cost the client its connection
+                    connection.send({'type': 'error', 'message': "The server could not handle that message"})
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.disconnect(connection)
+            writer.close()
+
+    def handle(self, connection, message):
+
+        handler = self._handlers.get(message.get('type')) if isinstance(message, dict) else None
+        if handler is None:
+            connection.send({'type': 'error', 'message': "Unknown message type"})
+            return
+        error = handler(connection, message)
+        if error:
+            connection.send({'type': 'error', 'message': error})
+
+    def disconnect(self, connection):
+
+        self._on_leave(connection, {})
+
+    ## handlers return an error message, or None when they answered themselves
+    def _on_new(self, connection, message):
+
+        if connection.session is not None:
+            return "Already in a session"
+        mode = message.get('mode', 'ai')
+        size = message.get('size', 10)
+        strategy = STRATEGIES.get(message.get('ai', 'random'))
+        if mode not in ('ai', 'human'):
+            return "Mode must be 'ai' or 'human'"
+        if type(size) is not int or not 1 <= size <= MAX_GRID_SIZE:
+            return f"Size must be an integer from 1 to {MAX_GRID_SIZE}"
+        if strategy is None:
+            return f"AI must be one of {', '.join(sorted(STRATEGIES))}"
+        if not self._fleet_fits(size):
+            return f"The fleet does not fit on a {size}x{size} board"
+
+        vs_ai = mode == 'ai'
+        controller = GameController(strategy if vs_ai else Player, Player, size)
+        session = Session(next(self._ids), controller, vs_ai)
+        controller.events.subscribe(ShotFired, lambda shot: self._announce_shot(session, shot))
+        controller.start_new_game(place_ai_ships=vs_ai)
+        self.sessions[session.id] = session
+        self._seat(connection, session, 0)
+        return None
+
+    def _fleet_fits(self, size):
+
+        if size not in self._fits:
+            self._fits[size] = Player(size=size).place_ships_randomly(guaranteed=True)
+        return self._fits[size]
+
+    def _on_join(self, connection, message):
+
+        session = self.sessions.get(message.get('session'))
+        if connection.session is not None:
+            return "Already in a session"
+        if session is None or session.vs_ai or session.seats[1] is not None:
+            return "No open seat in that session"
+        self._seat(connection, session, 1)
+        session.seats[0].send({'type': 'opponent_joined'})
+        return None
+
+    def _seat(self, connection, session, seat):
+
+        session.seats[seat] = connection
+        connection.session = session
+        connection.seat = seat
+        controller = session.controller
+        connection.send({'type': 'joined', 'session': session.id, 'seat': seat,
+                         'size': controller.grid_size, 'fleet': controller.fleet})
+
+    def _on_place(self, connection, message):
+
+        session = connection.session
+        if session is None:
+            return "Not in a session"
+        player = session.seat_player(connection.seat)
+        if not player.remaining_ships:
+            return "All ships are already placed"
+
+        controller = session.controller
+        if message.get('random'):
+            placed = (controller.place_player_ships_randomly() if connection.seat == 0
+                      else controller.place_ai_ships_randomly())
+        else:
+            ship_name = message.get('ship')
+            start = (message.get('row'), message.get('col'))
+            orientation = message.get('orientation', 'horizontal')
+            if ship_name not in controller.fleet or not all(type(value) is int for value in start):
+                return "Placement needs a ship from the fleet and integer row and col"
+            place = controller.place_player_ship if connection.seat == 0 else controller.place_ai_ship
+            placed = place(ship_name, start, orientation)
+        if not placed:
+            return "Invalid placement"
+
+        connection.send({'type': 'placed', 'remaining': [name for name, _ in player.remaining_ships]})
+        self._start_if_ready(session)
+        return None
+
+    def _start_if_ready(self, session):
+
+        if session.started or (not session.vs_ai and session.seats[1] is None):
+            return
+        controller = session.controller
+        if controller.player.remaining_ships or controller.ai_player.remaining_ships:
+            return
+        session.started = True
+        controller.current_turn = 'player'
+        session.broadcast({'type': 'start', 'turn': 0})
+
+    def _on_shot(self, connection, message):
+
+        session = connection.session
+        if session is None or not session.started:
+            return "The game has not started"
+        controller = session.controller
+        if controller.game_over:
+            return "The game is over"
+        if TURN_SEATS.get(controller.current_turn) != connection.seat:
+            return "Not your turn"
+        position = (message.get('row'), message.get('col'))
+        if not all(type(value) is int for value in position):
+            return "Shots need integer row and col"
+
+        ## shots reach both seats through the session's ShotFired subscription
+        if connection.seat == 0:
+            result = controller.process_player_shot(position)
+        else:
+            result = controller.process_ai_turn(position)
+        if result is None:
+            return "Invalid shot"
+
+        if session.vs_ai and not controller.game_over:
+            self._ai_reply(session)
+        return None
+
+    def _ai_reply(self, session):
+
+        controller = session.controller
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            ## no event loop (LocalClient): the AI answers within the same message
+            controller.process_ai_turn()
+            return
+        ## strategies can take a while to think, so they do it off the loop and the
+        ## move is applied back on it; shots meanwhile get "Not your turn"
+        ai_player = controller.ai_player
+        future = loop.run_in_executor(None, ai_player.get_shot_position)
+        future.add_done_callback(lambda done: self._apply_ai_move(session, ai_player, done))
+
+    def _apply_ai_move(self, session, ai_player, done):
+
+        if self.sessions.get(session.id) is not session or session.controller.ai_player is not ai_player:
+            return
+        if done.exception() is not None:
+            session.broadcast({'type': 'error', 'message': "The AI could not choose a move"})
+            return
+        session.controller.process_ai_turn(done.result())
+
+    def _announce_shot(self, session, shot):
+
+        seat = TURN_SEATS[shot.side]
+        session.broadcast({
+            'type': 'shot',
+            'seat': seat,
+            'row': shot.position[0],
+            'col': shot.position[1],
+            'hit': shot.hit,
+            'sunk': shot.ship_name,
+            'game_over': shot.game_over,
+            'winner': seat if shot.game_over else None,
+            'turn': None if shot.game_over else 1 - seat,
+        })
+
+    def _on_leave(self, connection, message):
+
+        session = connection.session
+        if session is None:
+            return None
+        session.seats[connection.seat] = None
+        connection.session = connection.seat = None
+
+        ## a match cannot go on with a seat empty, so the session ends with the first leaver
+        for other in session.seats:
+            if other is not None:
+                other.send({'type': 'opponent_left'})
+                other.session = other.seat = None
+        self.sessions.pop(session.id, None)
+        return None
+
+
+class LocalClient:
+    ## In-process stand-in for a TCP client: messages go straight to the server and the
+    ## replies collect in received, decoded
+
+    def __init__(self, server):
+
+        self.server = server
+        self.received = []
+        self.connection = Connection(lambda data: self.received.append(json.loads(data)))
+
+    def send(self, message):
+
+        self.server.handle(self.connection, message)
+
+    def take(self):
+
+        received, self.received = self.received, []
+        return received
+
+    def close(self):
+
+        self.server.disconnect(self.connection)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Host battleship matches over TCP")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    asyncio.run(GameServer().serve(args.host, args.port))
@@ -1,4 +1,4 @@
-from dataclasses import dataclass, field  
+from dataclasses import dataclass, field
 from typing import List, Tuple  
 from enum import Enum  
 
@@ -15,15 +15,15 @@ class ShipOrientation(Enum):
     HORIZONTAL = 'horizontal' 
     VERTICAL = 'vertical'     
 
-@dataclass
+@dataclass(slots=True)
 class Ship:
 
     
     name: str 
     size: int  
-    position: List[Tuple[int, int]] = field(default_factory=list)  
+    position: Tuple[Tuple[int, int], ...] = ()  
     orientation: ShipOrientation = ShipOrientation.HORIZONTAL 
-    hits: List[Tuple[int, int]] = field(default_factory=list)
+    hit_mask: int = field(default=0, kw_only=True)  # bit i is set once position[i] has been hit
 
     def __post_init__(self):
         
@@ -34,42 +34,64 @@ class Ship:
 
         if not isinstance(self.name, str) or not self.name:
             raise ValueError("Ship name must be a non-empty string")
+
+        if type(self.hit_mask) is not int or self.hit_mask < 0:
+            raise TypeError("hit_mask must be a non-negative int of hit bits")
         
         
-        self.position = list(dict.fromkeys(self.position))
-        self.hits = list(dict.fromkeys(self.hits))
+        ## kept in ascending order, which _index_of relies on
+        self.position = tuple(sorted(set(self.position)))
         
 
         if self.position and len(self.position) != self.size:
             raise ValueError(f"Position length ({len(self.position)}) must match ship size ({self.size})")
 
+    @property
+    def hits(self) -> List[Tuple[int, int]]:
+
+        return [pos for index, pos in enumerate(self.position) if self.hit_mask >> index & 1]
+
     def is_sunk(self):
         
-        return len(self.hits) == self.size
+        return self.hit_mask == (1 << self.size) - 1
+
+    def _index_of(self, position: Tuple[int, int]):
+
+        ## cells run in order from position[0] along one axis, so the offset is the index
+        if not self.position:
+            return None
+        row, col = self.position[0]
+        index = (position[0] - row) + (position[1] - col)
+        if 0 <= index < len(self.position) and self.position[index] == position:
+            return index
+        return None
 
     def take_hit(self, position: Tuple[int, int]):
         
-        if not self.position:
+        index = self._index_of(position)
+        if index is None:
             return False
-            
-        if position in self.position and position not in self.hits:
-            self.hits.append(position)
-            return True
-        return False
+
+        bit = 1 << index
+        if self.hit_mask & bit:
+            return False
+        self.hit_mask |= bit
+        return True
 
     def get_positions(self) -> List[Tuple[int, int]]:
         
-        return self.position.copy() 
+        return list(self.position) 
 
     def is_hit_at(self, position: Tuple[int, int]):
         
-        return position in self.hits
+        index = self._index_of(position)
+        return index is not None and bool(self.hit_mask >> index & 1)
 
     def get_damage_percentage(self):
         
         if not self.size:
             return 0.0
-        return (len(self.hits) / self.size) * 100
+        return (self.hit_mask.bit_count() / self.size) * 100
 
     def is_valid_position(self, position: List[Tuple[int, int]]):
         
@@ -100,13 +122,38 @@ class Ship:
             
         self.orientation = orientation
         if self.is_valid_position(position):
-            self.position = position
+            ## hits are bits over the position, so carry over the ones still on the ship
+            hits = self.hits
+            self.position = tuple(sorted(position))
+            self.hit_mask = 0
+            for pos in hits:
+                self.take_hit(pos)
             return True
         return False
 
     def clear_hits(self):
 
-        self.hits.clear()
+        self.hit_mask = 0
+
+    def to_dict(self):
+
+        return {
+            'name': self.name,
+            'size': self.size,
+            'position': [list(pos) for pos in self.position],
+            'orientation': self.orientation.value,
+            'hits': [list(pos) for pos in self.hits]
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+
+        ship = cls(data['name'], data['size'],
+                   [tuple(pos) for pos in data['position']],
+                   ShipOrientation(data['orientation']))
+        for pos in data['hits']:
+            ship.take_hit(tuple(pos))
+        return ship
 
     def __str__(self):
         
@@ -0,0 +1,199 @@
+import argparse
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from ai_player import AIPlayer
+from bitboard_grid import BitboardGrid
+from density_ai_player import DensityAIPlayer
+from events import EventBus
+from game_controller import GameController
+from grid import Grid
+from journal import GameJournal
+from monte_carlo_ai_player import MonteCarloAIPlayer, mark_worker
+from stats_store import GameRecorder, StatsStore
+
+## Strategies the runner can pit against each other by name
+STRATEGIES = {
+    'random': AIPlayer,
+    'density': DensityAIPlayer,
+    'montecarlo': MonteCarloAIPlayer,
+}
+## Board backends, by name
+GRID_BACKENDS = {
+    'list': Grid,
+    'bitboard': BitboardGrid,
+}
+
+
+def play_game(controller):
+
+    ## Plays one game to the end with an AIPlayer in the player's seat
+    controller.start_new_game()
+    if not controller.place_player_ships_randomly():
+        raise RuntimeError(f"The fleet does not fit on a {controller.grid_size}x{controller.grid_size} board")
+    shooter = controller.player
+
+    while not controller.game_over:
+        if controller.current_turn == 'player':
+            result = controller.process_player_shot(shooter.get_shot_position())
+        else:
+            result = controller.process_ai_turn()
+        if result is None:
+            raise RuntimeError(f"{controller.current_turn} made an invalid move")
+
+    return result.winner
+
+
+def _run_batch(job):
+
+    first, second, games, seed, size, journal_path, record, grid = job
+    ## every batch owns its seed, so results do not depend on which worker ran it
+    random.seed(seed)
+    journal = GameJournal(journal_path) if journal_path else None
+    ## subscribers see each game's events in one go when it ends
+    controller = GameController(ai_player_class=STRATEGIES.get(second, second),
+                                player_class=STRATEGIES.get(first, first),
+                                grid_size=size, journal=journal, events=EventBus(batched=True),
+                                grid_class=GRID_BACKENDS.get(grid, grid))
+
+    summary = _empty_summary()
+    ## record is None, 'games' or 'shots'; the records go back to the parent, which owns the store
+    if record:
+        recorder = GameRecorder(summary['records'].append, _strategy_name(first), _strategy_class_name(first),
+                                _strategy_class_name(second), record_shots=record == 'shots')
+        recorder.subscribe(controller.events)
+    for _ in range(games):
+        winner = play_game(controller)
+        first_shots = controller.stats['total_shots']
+        second_shots = len(controller.player.get_shots_fired())
+        summary['games'] += 1
+        summary['shots']['first'] += first_shots
+        summary['shots']['second'] += second_shots
+        if winner == 'player':
+            summary['wins']['first'] += 1
+            summary['shots_to_win']['first'][first_shots] += 1
+        else:
+            summary['wins']['second'] += 1
+            summary['shots_to_win']['second'][second_shots] += 1
+
+    if journal is not None:
+        journal.close()
+    return summary
+
+
+def _empty_summary():
+
+    return {
+        'games': 0,
+        'wins': {'first': 0, 'second': 0},
+        'shots': {'first': 0, 'second': 0},
+        'shots_to_win': {'first': Counter(), 'second': Counter()},
+        'records': [],
+    }
+
+
+def _strategy_name(strategy):
+
+    return strategy if isinstance(strategy, str) else strategy.__name__
+
+
+def _strategy_class_name(strategy):
+
+    return STRATEGIES.get(strategy, strategy).__name__
+
+
+def _merge(total, summary):
+
+    total['games'] += summary['games']
+    for side in ('first', 'second'):
+        total['wins'][side] += summary['wins'][side]
+        total['shots'][side] += summary['shots'][side]
+        total['shots_to_win'][side].update(summary['shots_to_win'][side])
+
+
+def run_simulation(games, first='density', second='random', workers=None, seed=None, batch_size=500, size=10,
+                   journal_dir=None, stats_path=None, stats_shots=False, grid='list'):
+
+    ## first takes the player's seat and always shoots first; with journal_dir
+    ## every batch appends its games to its own journal file there, with stats_path
+    ## every game (and with stats_shots every shot) goes into that StatsStore;
+    ## grid names one of GRID_BACKENDS (or is a Grid class) for both boards
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    seeds = random.Random(seed)
+
+    record = ('shots' if stats_shots else 'games') if stats_path else None
+    jobs = []
+    for number, start in enumerate(range(0, games, batch_size)):
+        journal_path = os.path.join(journal_dir, f"batch-{number:06d}.bsj") if journal_dir else None
+        jobs.append((first, second, min(batch_size, games - start), seeds.getrandbits(64), size, journal_path,
+                     record, grid))
+
+    total = _empty_summary()
+    store = StatsStore(stats_path, batch_size=max(batch_size, 1000)) if stats_path else None
+    started = time.perf_counter()
+    if workers == 1:
+        summaries = map(_run_batch, jobs)
+    else:
+        ## the games already use every worker, so Monte Carlo players in them sample in-process
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=mark_worker)
+        summaries = executor.map(_run_batch, jobs)
+    try:
+        for summary in summaries:
+            _merge(total, summary)
+            if store is not None:
+                store.add_games(summary['records'])
+    finally:
+        if workers != 1:
+            executor.shutdown()
+        if store is not None:
+            store.close()
+    elapsed = time.perf_counter() - started
+
+    del total['records']
+    total['first'] = _strategy_name(first)
+    total['second'] = _strategy_name(second)
+    total['seed'] = seed
+    total['size'] = size
+    total['elapsed'] = elapsed
+    total['games_per_second'] = total['games'] / elapsed if elapsed else 0.0
+    return total
+
+
+def format_report(summary):
+
+    games = summary['games'] or 1
+    lines = [f"{summary['games']} games on {summary['size']}x{summary['size']} in {summary['elapsed']:.2f}s "
+             f"({summary['games_per_second']:.0f} games/s, seed {summary['seed']})"]
+    for side in ('first', 'second'):
+        wins = summary['wins'][side]
+        to_win = summary['shots_to_win'][side]
+        average = sum(shots * count for shots, count in to_win.items()) / wins if wins else 0.0
+        lines.append(f"  {side:6} {summary[side]:10} wins {wins:8} ({100 * wins / games:5.1f}%)"
+                     f"  avg shots to win {average:5.1f}"
+                     f"  shots/game {summary['shots'][side] / games:5.1f}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Play AI-vs-AI games without the GUI")
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--first', choices=sorted(STRATEGIES), default='density')
+    parser.add_argument('--second', choices=sorted(STRATEGIES), default='random')
+    parser.add_argument('--workers', type=int, default=None, help="processes to use, 1 runs in this process")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--size', type=int, default=10, help="board size")
+    parser.add_argument('--grid', choices=sorted(GRID_BACKENDS), default='list', help="board backend")
+    parser.add_argument('--journal-dir', help="write a game journal per batch into this directory")
+    parser.add_argument('--stats', help="add every game to this SQLite statistics file")
+    parser.add_argument('--stats-shots', action='store_true', help="keep every shot in the statistics too")
+    args = parser.parse_args()
+
+    print(format_report(run_simulation(args.games, args.first, args.second, args.workers, args.seed,
+                                       args.batch_size, args.size, args.journal_dir, args.stats,
+                                       args.stats_shots, args.grid)))
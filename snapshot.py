@@ -0,0 +1,296 @@
+import json
+import struct
+
+from ai_player import AIPlayer
+from density_ai_player import DensityAIPlayer
+from game_controller import GameController, player_class_by_name
+from grid import Grid
+from monte_carlo_ai_player import MonteCarloAIPlayer
+from player import Player
+from ship import Ship, ShipOrientation, SHIPS
+
+## Binary layout, all little endian:
+##   header      b'BSNP', version (B), kind (B)
+##   fleet       0 (B) for ship.SHIPS, or 1 (B), count (H), then name (B length + utf-8) and size (H) per ship
+##   grid        size (H), ship count (H), then fleet index (H), row (H), col (H), vertical (B) per ship,
+##               then the shot cells
+##   cells       0 (B) and a row-major bitmask, or 1 (B), count (I) and that many cell indices (I),
+##               whichever is smaller
+##   player      class name, fleet, grid, and for AIPlayer parity (B, 255 = off) and attacked cells
+##   controller  grid size (H), turn (B), game over (B), total shots, hits and misses (3I), player and
+##               AI class names, player name, fleet, has game (B), then both players when there is a game
+## Hits are not stored: they are the shot cells a ship covers, and replaying the shots rebuilds them.
+MAGIC = b'BSNP'
+VERSION = 2
+KIND_GRID, KIND_PLAYER, KIND_CONTROLLER = 1, 2, 3
+TURNS = (None, 'player', 'ai')
+NO_PARITY = 255
+## player_class_by_name only finds subclasses that have been imported
+_PLAYER_CLASSES = (DensityAIPlayer, MonteCarloAIPlayer)
+
+
+class _Writer:
+
+    def __init__(self):
+
+        self.parts = []
+
+    def pack(self, fmt, *values):
+
+        self.parts.append(struct.pack('<' + fmt, *values))
+
+    def text(self, value):
+
+        data = value.encode()
+        self.pack('B', len(data))
+        self.parts.append(data)
+
+    def getvalue(self):
+
+        return b''.join(self.parts)
+
+
+class _Reader:
+
+    def __init__(self, data):
+
+        self.data = memoryview(data)
+        self.offset = 0
+
+    def unpack(self, fmt):
+
+        fmt = '<' + fmt
+        values = struct.unpack_from(fmt, self.data, self.offset)
+        self.offset += struct.calcsize(fmt)
+        return values
+
+    def raw(self, size):
+
+        data = self.data[self.offset:self.offset + size]
+        self.offset += size
+        return data
+
+    def text(self):
+
+        (length,) = self.unpack('B')
+        return bytes(self.raw(length)).decode()
+
+
+def _write_cells(out, size, cells):
+
+    mask_bytes = (size * size + 7) // 8
+    if 4 * len(cells) + 4 < mask_bytes:
+        out.pack('BI', 1, len(cells))
+        out.pack(f'{len(cells)}I', *[row * size + col for row, col in cells])
+        return
+
+    bits = bytearray(mask_bytes)
+    for row, col in cells:
+        idx = row * size + col
+        bits[idx >> 3] |= 1 << (idx & 7)
+    out.pack('B', 0)
+    out.parts.append(bytes(bits))
+
+
+def _read_cells(inp, size):
+
+    (encoding,) = inp.unpack('B')
+    if encoding == 1:
+        (count,) = inp.unpack('I')
+        return [divmod(idx, size) for idx in inp.unpack(f'{count}I')]
+
+    cells = []
+    for byte_idx, byte in enumerate(inp.raw((size * size + 7) // 8)):
+        while byte:
+            low = byte & -byte
+            cells.append(divmod(byte_idx * 8 + low.bit_length() - 1, size))
+            byte ^= low
+    return cells
+
+
+def _write_fleet(out, fleet):
+
+    ## fleet is a list of (name, size); a bare grid's ships may share a name
+    if fleet == list(SHIPS.items()):
+        out.pack('B', 0)
+        return
+    out.pack('BH', 1, len(fleet))
+    for name, ship_size in fleet:
+        out.text(name)
+        out.pack('H', ship_size)
+
+
+def _read_fleet(inp):
+
+    (custom,) = inp.unpack('B')
+    if not custom:
+        return list(SHIPS.items())
+    fleet = []
+    for _ in range(inp.unpack('H')[0]):
+        name = inp.text()
+        fleet.append((name, inp.unpack('H')[0]))
+    return fleet
+
+
+def _write_grid(out, grid, fleet):
+
+    if grid.size > 0xFFFF:
+        raise ValueError("Boards above 65535x65535 cannot be snapshotted")
+    index = {ship: number for number, ship in enumerate(fleet)}
+    out.pack('HH', grid.size, len(grid.ships))
+    for ship in grid.ships:
+        row, col = min(ship.position)
+        out.pack('HHHB', index[ship.name, ship.size], row, col, ship.orientation is ShipOrientation.VERTICAL)
+    _write_cells(out, grid.size, grid.get_shots_fired())
+
+
+def _read_grid(inp, fleet, grid_class):
+
+    size, ship_count = inp.unpack('HH')
+    grid = grid_class(size)
+    for _ in range(ship_count):
+        number, row, col, vertical = inp.unpack('HHHB')
+        name, ship_size = fleet[number]
+        grid.place_ship(Ship(name, ship_size), (row, col), 'vertical' if vertical else 'horizontal')
+    for pos in _read_cells(inp, size):
+        grid.receive_shot(pos)
+    return grid
+
+
+def _write_player(out, player):
+
+    out.text(type(player).__name__)
+    fleet = list(player.fleet.items())
+    _write_fleet(out, fleet)
+    _write_grid(out, player.grid, fleet)
+    if isinstance(player, AIPlayer):
+        parity = player.get_parity()
+        out.pack('B', NO_PARITY if parity is False else parity)
+        _write_cells(out, player.grid.size, player.attacked_positions)
+
+
+def _read_player(inp, grid_class):
+
+    player_class = player_class_by_name(inp.text())
+    fleet = _read_fleet(inp)
+    grid = _read_grid(inp, fleet, grid_class)
+    fleet = dict(fleet)
+    if issubclass(player_class, AIPlayer):
+        (parity,) = inp.unpack('B')
+        player = player_class(grid, fleet=fleet, parity=False if parity == NO_PARITY else parity)
+        for pos in _read_cells(inp, grid.size):
+            player._mark_attacked(pos)
+    else:
+        player = player_class(grid, fleet=fleet)
+
+    player._adopt_grid_ships()
+    return player
+
+
+def _write_controller(out, controller):
+
+    stats = controller.stats
+    out.pack('HBB3I', controller.grid_size, TURNS.index(controller.current_turn), controller.game_over,
+             stats['total_shots'], stats['hits'], stats['misses'])
+    out.text(controller.player_class.__name__)
+    out.text(controller.ai_player_class.__name__)
+    out.text(controller.player_name)
+    _write_fleet(out, list(controller.fleet.items()))
+    out.pack('B', controller.player is not None)
+    if controller.player is not None:
+        _write_player(out, controller.player)
+        _write_player(out, controller.ai_player)
+
+
+def _read_controller(inp, grid_class):
+
+    grid_size, turn, game_over, total_shots, hits, misses = inp.unpack('HBB3I')
+    player_class = player_class_by_name(inp.text())
+    ai_player_class = player_class_by_name(inp.text())
+    player_name = inp.text()
+    controller = GameController(ai_player_class, player_class, grid_size, dict(_read_fleet(inp)),
+                                player_name=player_name, grid_class=grid_class)
+    controller.current_turn = TURNS[turn]
+    controller.game_over = bool(game_over)
+    controller.stats.update({'total_shots': total_shots, 'hits': hits, 'misses': misses})
+
+    (has_game,) = inp.unpack('B')
+    if has_game:
+        controller.player = _read_player(inp, grid_class)
+        controller.ai_player = _read_player(inp, grid_class)
+        controller.replay_observations()
+    return controller
+
+
+def _kind_of(obj):
+
+    if isinstance(obj, GameController):
+        return KIND_CONTROLLER
+    if isinstance(obj, Player):
+        return KIND_PLAYER
+    if isinstance(obj, Grid):
+        return KIND_GRID
+    raise TypeError(f"Cannot snapshot {type(obj).__name__}")
+
+
+def dumps(obj):
+
+    ## Compact binary snapshot of a Grid, Player, AIPlayer or GameController
+    out = _Writer()
+    kind = _kind_of(obj)
+    out.parts.append(MAGIC)
+    out.pack('BB', VERSION, kind)
+    if kind == KIND_CONTROLLER:
+        _write_controller(out, obj)
+    elif kind == KIND_PLAYER:
+        _write_player(out, obj)
+    else:
+        fleet = list(dict.fromkeys((ship.name, ship.size) for ship in obj.ships))
+        _write_fleet(out, fleet)
+        _write_grid(out, obj, fleet)
+    return out.getvalue()
+
+
+def loads(data, grid_class=Grid):
+
+    inp = _Reader(data)
+    if bytes(inp.raw(len(MAGIC))) != MAGIC:
+        raise ValueError("Not a game snapshot")
+    version, kind = inp.unpack('BB')
+    if version != VERSION:
+        raise ValueError(f"Unsupported snapshot version {version}")
+
+    if kind == KIND_CONTROLLER:
+        return _read_controller(inp, grid_class)
+    if kind == KIND_PLAYER:
+        return _read_player(inp, grid_class)
+    if kind == KIND_GRID:
+        return _read_grid(inp, _read_fleet(inp), grid_class)
+    raise ValueError(f"Unknown snapshot kind {kind}")
+
+
+def dumps_json(obj):
+
+    ## Readable fallback built on the classes' own to_dict
+    kind = _kind_of(obj)
+    snapshot = {'version': VERSION, 'kind': kind, 'data': obj.to_dict()}
+    if kind == KIND_PLAYER:
+        snapshot['class'] = type(obj).__name__
+    return json.dumps(snapshot, separators=(',', ':'))
+
+
+def loads_json(text, grid_class=Grid):
+
+    snapshot = json.loads(text)
+    ## version 2 only changed the binary layout, so version 1 JSON still reads
+    if snapshot.get('version') not in (1, VERSION):
+        raise ValueError(f"Unsupported snapshot version {snapshot.get('version')}")
+
+    kind, data = snapshot['kind'], snapshot['data']
+    if kind == KIND_CONTROLLER:
+        return GameController.from_dict(data, grid_class)
+    if kind == KIND_PLAYER:
+        return player_class_by_name(snapshot['class']).from_dict(data, grid_class)
+    if kind == KIND_GRID:
+        return grid_class.from_dict(data)
+    raise ValueError(f"Unknown snapshot kind {kind}")
@@ -1,13 +1,12 @@
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QPushButton, QLabel, QMainWindow
 from PyQt6.QtCore import Qt
-from instructions_screen import InstructionsScreen
 import sys
 
 class StartScreen(QMainWindow):
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
-        self.instructions_window = InstructionsScreen()
+        self.instructions_window = None  # Built the first time it is shown
         self.init_ui()
 
     def init_ui(self):
@@ -43,6 +42,9 @@ class StartScreen(QMainWindow):
         self.main_window.start_new_game()
 
     def show_instructions(self):
+        if self.instructions_window is None:
+            from instructions_screen import InstructionsScreen
+            self.instructions_window = InstructionsScreen()
         self.instructions_window.show()
         self.instructions_window.raise_()
         self.instructions_window.showFullScreen()
@@ -0,0 +1,193 @@
+import sqlite3
+import time
+from collections import Counter
+
+from events import GameOver, GameStarted, ShotFired
+from journal import HIT, MISS, SUNK, SIDES
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    played_at REAL NOT NULL,
+    grid_size INTEGER NOT NULL,
+    player_name TEXT NOT NULL,
+    player_strategy TEXT NOT NULL,
+    ai_strategy TEXT NOT NULL,
+    winner TEXT NOT NULL,
+    player_shots INTEGER NOT NULL,
+    player_hits INTEGER NOT NULL,
+    ai_shots INTEGER NOT NULL,
+    ai_hits INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS shots (
+    game_id INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    side INTEGER NOT NULL,
+    row INTEGER NOT NULL,
+    col INTEGER NOT NULL,
+    outcome INTEGER NOT NULL,
+    PRIMARY KEY (game_id, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS games_by_player ON games (player_name, winner);
+CREATE INDEX IF NOT EXISTS games_by_strategy ON games (player_strategy, ai_strategy, winner);
+"""
+
+GAME_COLUMNS = ('played_at', 'grid_size', 'player_name', 'player_strategy', 'ai_strategy', 'winner',
+                'player_shots', 'player_hits', 'ai_shots', 'ai_hits')
+FILTERS = ('player_name', 'player_strategy', 'ai_strategy', 'grid_size')
+INSERT_GAME = f"INSERT INTO games (id, {', '.join(GAME_COLUMNS)}) VALUES ({', '.join('?' * (len(GAME_COLUMNS) + 1))})"
+INSERT_SHOT = "INSERT INTO shots (game_id, seq, side, row, col, outcome) VALUES (?, ?, ?, ?, ?, ?)"
+
+
+class GameRecorder:
+    ## Turns a controller's events into finished-game records, handed to sink at
+    ## game over: a tuple in GAME_COLUMNS order followed by the list of shot rows
+    ## (seq, side, row, col, outcome), which stays empty unless record_shots is set
+
+    def __init__(self, sink, player_name, player_strategy, ai_strategy, record_shots=False):
+
+        self.sink = sink
+        self.names = (player_name, player_strategy, ai_strategy)
+        self.record_shots = record_shots
+        self.grid_size = 0
+        self.counts = [0, 0, 0, 0]  # player shots, player hits, AI shots, AI hits
+        self.shots = []
+
+    def subscribe(self, events):
+
+        events.subscribe(GameStarted, self._on_game_started)
+        events.subscribe(ShotFired, self._on_shot_fired)
+        events.subscribe(GameOver, self._on_game_over)
+
+    def _on_game_started(self, event):
+
+        self.grid_size = event.grid_size
+        self.counts = [0, 0, 0, 0]
+        self.shots = []
+
+    def _on_shot_fired(self, event):
+
+        side = SIDES.index(event.side)
+        self.counts[2 * side] += 1
+        self.counts[2 * side + 1] += event.hit
+        if self.record_shots:
+            outcome = SUNK if event.sunk else HIT if event.hit else MISS
+            self.shots.append((len(self.shots), side, event.position[0], event.position[1], outcome))
+
+    def _on_game_over(self, event):
+
+        self.sink(((time.time(), self.grid_size) + self.names + (event.winner,) + tuple(self.counts),
+                   self.shots))
+
+
+class StatsStore:
+    ## Games played, kept in a SQLite file. Records are buffered and written
+    ## batch_size at a time in one transaction; flush() or close() writes the rest.
+
+    def __init__(self, path, batch_size=500):
+
+        self.path = path
+        self.batch_size = batch_size
+        self.pending = []
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def subscribe(self, events, player_name='Player', player_strategy='human', ai_strategy='AIPlayer',
+                  record_shots=True):
+
+        recorder = GameRecorder(self.add_game, player_name, player_strategy, ai_strategy, record_shots)
+        recorder.subscribe(events)
+        return recorder
+
+    def add_game(self, record):
+
+        self.pending.append(record)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def add_games(self, records):
+
+        self.pending.extend(records)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, []
+        with self.connection:
+            ## ids are handed out here so the shot rows can point at their game
+            (first_id,) = self.connection.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM games").fetchone()
+            self.connection.executemany(
+                INSERT_GAME, [(first_id + number,) + game for number, (game, _) in enumerate(pending)])
+            self.connection.executemany(
+                INSERT_SHOT, [(first_id + number,) + shot for number, (_, shots) in enumerate(pending) for shot in shots])
+
+    def close(self):
+
+        self.flush()
+        self.connection.close()
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, *exc_info):
+
+        self.close()
+
+    ## queries, all filtered by any of FILTERS given as keyword arguments
+    def _where(self, filters):
+
+        unknown = set(filters) - set(FILTERS)
+        if unknown:
+            raise ValueError(f"Cannot filter games by {', '.join(sorted(unknown))}")
+        clauses = [f"{column} = ?" for column, value in filters.items() if value is not None]
+        params = [value for value in filters.values() if value is not None]
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def win_rate(self, side='player', **filters):
+
+        ## (games, wins, rate) for the given seat
+        self.flush()
+        where, params = self._where(filters)
+        games, wins = self.connection.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(winner = ?), 0) FROM games{where}", [side] + params).fetchone()
+        return games, wins, wins / games if games else 0.0
+
+    def shots_to_win(self, side='player', **filters):
+
+        ## Counter of shots the winning seat needed -> games
+        self.flush()
+        where, params = self._where(filters)
+        where += (" AND " if where else " WHERE ") + "winner = ?"
+        column = 'player_shots' if side == 'player' else 'ai_shots'
+        rows = self.connection.execute(
+            f"SELECT {column}, COUNT(*) FROM games{where} GROUP BY {column}", params + [side])
+        return Counter(dict(rows))
+
+    def accuracy_by_player(self, **filters):
+
+        ## {player_name: (shots, hits, accuracy)} for the player's seat
+        self.flush()
+        where, params = self._where(filters)
+        rows = self.connection.execute(
+            f"SELECT player_name, SUM(player_shots), SUM(player_hits) FROM games{where} GROUP BY player_name",
+            params)
+        return {name: (shots, hits, hits / shots if shots else 0.0) for name, shots, hits in rows}
+
+    def accuracy_by_strategy(self, **filters):
+
+        ## {strategy: (shots, hits, accuracy)} over both seats
+        self.flush()
+        where, params = self._where(filters)
+        rows = self.connection.execute(
+            f"SELECT strategy, SUM(shots), SUM(hits) FROM ("
+            f" SELECT player_strategy AS strategy, player_shots AS shots, player_hits AS hits FROM games{where}"
+            f" UNION ALL"
+            f" SELECT ai_strategy, ai_shots, ai_hits FROM games{where}"
+            f") GROUP BY strategy", params + params)
+        return {strategy: (shots, hits, hits / shots if shots else 0.0) for strategy, shots, hits in rows}
@@ -0,0 +1,47 @@
+import pytest
+
+import player
+from ai_player import AIPlayer
+from bitboard_grid import BitboardGrid
+from density_ai_player import DensityAIPlayer
+from game_controller import GameController
+from grid import Grid
+from simulation import play_game, run_simulation
+
+
+@pytest.fixture
+def unlucky_placement(monkeypatch):
+
+    ## random tries that never find a layout, as on a crowded board
+    search = player.random_fleet_layout
+    monkeypatch.setattr(player, 'random_fleet_layout',
+                        lambda board_size, fleet, blocked=0, guaranteed=False: (
+                            search(board_size, fleet, blocked, True) if guaranteed else None))
+
+
+def test_random_placement_falls_back_to_the_exhaustive_search(unlucky_placement):
+
+    controller = GameController(ai_player_class=AIPlayer, player_class=AIPlayer, grid_size=8)
+    assert play_game(controller) in ('player', 'ai')
+    assert not controller.player.remaining_ships and not controller.ai_player.remaining_ships
+
+
+def test_a_fleet_that_cannot_fit_is_reported():
+
+    controller = GameController(grid_size=6)
+    with pytest.raises(RuntimeError, match="does not fit"):
+        controller.start_new_game()
+    controller.start_new_game(place_ai_ships=False)
+    assert not controller.place_player_ships_randomly()
+
+
+@pytest.mark.parametrize('grid_class', [Grid, BitboardGrid])
+def test_games_play_on_either_grid(grid_class):
+
+    controller = GameController(ai_player_class=DensityAIPlayer, player_class=AIPlayer, grid_class=grid_class)
+    assert play_game(controller) in ('player', 'ai')
+    assert type(controller.player.grid) is grid_class and type(controller.ai_player.grid) is grid_class
+    assert len(controller.ai_player.grid.get_shots_fired()) == controller.stats['total_shots']
+
+    summary = run_simulation(4, 'density', 'random', workers=1, seed=1, grid=grid_class)
+    assert summary['games'] == 4
@@ -0,0 +1,51 @@
+import pytest
+
+from bitboard_grid import BitboardGrid
+from grid import Grid, SPARSE_GRID_THRESHOLD
+from ship import Ship
+
+GRID_CLASSES = [Grid, BitboardGrid]
+
+
+@pytest.mark.parametrize('grid_class', GRID_CLASSES)
+@pytest.mark.parametrize('size', [10, SPARSE_GRID_THRESHOLD + 20])
+def test_shots_iterate_in_the_order_they_landed(grid_class, size):
+
+    grid = grid_class(size)
+    assert grid.place_ship(Ship('Destroyer', 3), (4, 2), 'horizontal')
+    shots = [(9, 9), (4, 3), (0, 5), (4, 2), (7, 1), (4, 4), (0, 0)]
+    for pos in shots:
+        grid.receive_shot(pos)
+    grid.receive_shot((9, 9))  # already shot, not logged again
+
+    assert list(grid.get_shots_fired()) == shots
+    assert list(grid.get_hits()) == [(4, 3), (4, 2), (4, 4)]
+    assert list(grid.get_misses()) == [(9, 9), (0, 5), (7, 1), (0, 0)]
+    assert len(grid.get_shots_fired()) == 7 and (4, 2) in grid.get_hits() and (4, 2) not in grid.get_misses()
+    assert grid.all_ships_sunk()
+    assert grid_class.from_dict(grid.to_dict()).to_dict()['shots'] == shots
+
+    grid.clear()
+    assert not grid.get_shots_fired() and list(grid.get_misses()) == []
+
+
+@pytest.mark.parametrize('grid_class', GRID_CLASSES)
+@pytest.mark.parametrize('size', [10, SPARSE_GRID_THRESHOLD + 20])
+def test_cell_states(grid_class, size):
+
+    grid = grid_class(size)
+    assert grid.place_ship(Ship('Destroyer', 2), (1, 1), 'vertical')
+    grid.receive_shot((1, 1))
+    grid.receive_shot((0, 0))
+    assert [grid.get_cell_state(pos) for pos in [(1, 1), (2, 1), (0, 0), (0, 1), (size, 0)]] == \
+        ['hit', 'ship', 'miss', 'empty', 'invalid']
+    assert grid.receive_shot((1, 1)) == (False, None) and grid.receive_shot((0, 0)) == (False, None)
+    assert (len(grid.get_hits()), len(grid.get_misses())) == (1, 1)
+
+
+def test_bitboard_grid_sets_every_inherited_slot():
+
+    grid = BitboardGrid(10)
+    for name in Grid.__slots__:
+        getattr(grid, name)
+    assert not grid.sparse and grid.shot_counts == [0, 0, 0]
@@ -0,0 +1,136 @@
+import random
+
+import pytest
+
+from ai_player import AIPlayer
+from events import EventBus
+from game_controller import GameController
+from journal import (GAME_OVER, GAME_START, HEADER, HIT, MAGIC, MISS, NO_SHIP, PLACEMENT, RECORD, SHOT, SIDES,
+                     SUNK, VERSION, GameJournal, JournalReader)
+from simulation import play_game
+
+
+def play_journaled(path, games, seed=0, batched=False, **controller_options):
+
+    random.seed(seed)
+    with GameJournal(path, buffer_records=64) as journal:
+        controller = GameController(player_class=AIPlayer, journal=journal, events=EventBus(batched=batched),
+                                    **controller_options)
+        played = []
+        for _ in range(games):
+            winner = play_game(controller)
+            played.append((winner, set(controller.player.grid.shots), set(controller.ai_player.grid.shots)))
+    return played
+
+
+@pytest.mark.parametrize('batched', [False, True])
+def test_games_round_trip(tmp_path, batched):
+
+    path = tmp_path / 'games.bsj'
+    played = play_journaled(path, 3, batched=batched)
+    with JournalReader(path) as reader:
+        assert [event.game for event in reader if event.kind == GAME_START] == [0, 1, 2]
+        for game, (winner, player_grid_shots, ai_grid_shots) in enumerate(played):
+            events = list(reader.game_events(game))
+            assert [event.seq for event in events] == list(range(len(events)))
+            assert events[0].kind == GAME_START and events[0].row == 10 and events[0].col == 5
+            assert sum(event.kind == PLACEMENT for event in events) == 10
+            assert events[-1].kind == GAME_OVER and SIDES[events[-1].side] == winner
+
+            shots = [event for event in events if event.kind == SHOT]
+            ## the player fires at the AI's grid and the AI at the player's
+            assert {(e.row, e.col) for e in shots if e.side == 0} == ai_grid_shots
+            assert {(e.row, e.col) for e in shots if e.side == 1} == player_grid_shots
+            assert all((e.value == MISS) == (e.ship == NO_SHIP) for e in shots)
+            assert sum(e.value == SUNK for e in shots if SIDES[e.side] == winner) == 5
+
+
+def test_reopening_appends_new_games(tmp_path):
+
+    path = tmp_path / 'games.bsj'
+    play_journaled(path, 2)
+    play_journaled(path, 1, seed=1)
+    with JournalReader(path) as reader:
+        assert [event.game for event in reader if event.kind == GAME_START] == [0, 1, 2]
+        assert reader.find_game(2) == len(reader) - len(list(reader.game_events(2)))
+        assert reader.find_game(7) == len(reader)
+        assert list(reader.game_events(7)) == []
+
+
+def test_partial_trailing_record_is_dropped(tmp_path):
+
+    path = tmp_path / 'games.bsj'
+    play_journaled(path, 1)
+    with JournalReader(path) as reader:
+        count = len(reader)
+    with open(path, 'ab') as out:
+        out.write(b'\x01' * (RECORD.size // 2))
+
+    play_journaled(path, 1, seed=1)
+    assert (path.stat().st_size - HEADER.size) % RECORD.size == 0
+    with JournalReader(path) as reader:
+        assert reader[count].kind == GAME_START and reader[count].game == 1
+        assert all(event.game in (0, 1) and event.kind <= GAME_OVER for event in reader)
+
+
+def test_torn_header_is_rewritten(tmp_path):
+
+    path = tmp_path / 'games.bsj'
+    path.write_bytes(HEADER.pack(MAGIC, VERSION, RECORD.size)[:7])
+    with JournalReader(path) as reader:
+        assert len(reader) == 0
+
+    play_journaled(path, 1)
+    with JournalReader(path) as reader:
+        assert reader[0].kind == GAME_START and reader[0].game == 0
+        assert (path.stat().st_size - HEADER.size) % RECORD.size == 0
+
+
+def test_large_fleet_ship_numbers(tmp_path):
+
+    path = tmp_path / 'fleet.bsj'
+    with GameJournal(path) as journal:
+        journal.begin_game(60, 300)
+        journal.record_shot(0, (59, 59), HIT, 299)
+        journal.record_shot(1, (0, 0), SUNK, 255)
+        journal.record_shot(1, (1, 1), MISS)
+    with JournalReader(path) as reader:
+        assert [(event.value, event.ship) for event in reader][1:] == [(HIT, 299), (SUNK, 255), (MISS, NO_SHIP)]
+        assert reader[1].row == 59 and reader[-1].col == 1
+
+
+def test_big_fleet_game(tmp_path):
+
+    ## 300 one-cell ships on 60x60, more ships than fit in a byte
+    path = tmp_path / 'fleet.bsj'
+    fleet = {f"ship {number}": 1 for number in range(300)}
+    play_journaled(path, 1, grid_size=60, fleet=fleet)
+    with JournalReader(path) as reader:
+        ships = [event.ship for event in reader if event.kind == PLACEMENT]
+        assert len(ships) == 600 and max(ships) == 299
+
+
+def test_unflushed_journal_reads_as_empty(tmp_path):
+
+    path = tmp_path / 'new.bsj'
+    journal = GameJournal(path)
+    with JournalReader(path) as reader:
+        assert len(reader) == 0
+        assert list(reader) == []
+        assert reader.find_game(0) == 0
+        with pytest.raises(IndexError):
+            reader[0]
+    journal.close()
+    with JournalReader(path) as reader:
+        assert len(reader) == 0
+
+
+def test_rejects_other_files(tmp_path):
+
+    path = tmp_path / 'other.bsj'
+    path.write_bytes(b'BSJ1\x01\x00\x10\x00' + bytes(8))
+    with pytest.raises(ValueError):
+        JournalReader(path)
+    path.write_bytes(b'abc')
+    with pytest.raises(ValueError):
+        JournalReader(path)
@@ -0,0 +1,31 @@
+import tracemalloc
+
+import pytest
+
+from ai_player import AIPlayer
+from benchmark import measure_game_memory
+from bitboard_grid import BitboardGrid
+from density_ai_player import DensityAIPlayer
+from grid import Grid
+
+
+## a finished 10x10 game kept about 95 KiB (random AI) and 46 KiB (density AI)
+## alive before slots and flat cell arrays; both are now well under these bounds
+@pytest.mark.parametrize('ai_class, bound_kib', [(AIPlayer, 16), (DensityAIPlayer, 24)])
+def test_finished_game_footprint(ai_class, bound_kib):
+
+    per_game = measure_game_memory(ai_class, games=20)
+    assert 0 < per_game < bound_kib * 1024
+
+
+@pytest.mark.parametrize('grid_class', [Grid, BitboardGrid])
+def test_large_empty_board_is_cheap(grid_class):
+
+    ## nothing per cell is allocated until ships are placed or shots land
+    tracemalloc.start()
+    try:
+        grid_class(1000)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert peak < 64 * 1024
@@ -0,0 +1,60 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations, product
+
+import pytest
+
+from monte_carlo_ai_player import MonteCarloAIPlayer, _placements, mark_worker, sample_layouts
+
+
+def exact_coverage(board_size, ship_sizes, blocked, hits):
+
+    ## share of all legal layouts that put a ship on each cell, by enumeration
+    groups = {}
+    for ship_size in ship_sizes:
+        groups[ship_size] = groups.get(ship_size, 0) + 1
+    choices = [list(combinations(_placements(board_size, ship_size), count)) for ship_size, count in groups.items()]
+    layouts = 0
+    counts = [0] * (board_size * board_size)
+    for picks in product(*choices):
+        layout = [placement for group in picks for placement in group]
+        forbidden = cells = 0
+        for placement in layout:
+            if placement[0] & (forbidden | blocked) or placement[0] & ~hits == 0:
+                break
+            forbidden |= placement[1]
+            cells |= placement[0]
+        else:
+            if cells & hits == hits:
+                layouts += 1
+                for placement in layout:
+                    for number in placement[2]:
+                        counts[number] += 1
+    return [count / layouts for count in counts]
+
+
+@pytest.mark.parametrize('ship_sizes, blocked, hits', [
+    ((3, 2, 2), 0, 0),
+    ((3, 2, 2), 1 << 5, 1 << 9),
+])
+def test_samples_estimate_the_uniform_posterior(ship_sizes, blocked, hits):
+
+    accepted, counts = sample_layouts(5, ship_sizes, blocked, hits, 20000, float('inf'), 1)
+    assert accepted
+    total = sum(counts) / sum(ship_sizes)
+    exact = exact_coverage(5, ship_sizes, blocked, hits)
+    assert max(abs(count / total - share) for count, share in zip(counts, exact)) < 0.02
+
+
+def _default_workers():
+
+    return MonteCarloAIPlayer(size=6).workers
+
+
+def test_players_in_game_pools_sample_in_process(monkeypatch):
+
+    ## the pool forks after the patch, so its worker sees 8 cpus too
+    monkeypatch.setattr(os, 'cpu_count', lambda: 8)
+    assert _default_workers() == 8
+    with ProcessPoolExecutor(1, initializer=mark_worker) as executor:
+        assert executor.submit(_default_workers).result() == 1
@@ -0,0 +1,49 @@
+import pytest
+
+import opening_book
+from ai_player import AIPlayer
+from density_ai_player import DensityAIPlayer
+from opening_book import ENTRY, OpeningBook, fleet_key, write_book
+from ship import SHIPS
+from zobrist import SYMMETRIES
+
+LINE = [0, 7, 14, 21, 28, 35]
+
+
+@pytest.fixture
+def book(tmp_path, monkeypatch):
+
+    path = tmp_path / 'openings.bsob'
+    write_book(path, {(name, 6, fleet_key(SHIPS)): LINE for name in ('AIPlayer', 'DensityAIPlayer')})
+    monkeypatch.setenv('BATTLESHIP_OPENINGS', str(path))
+    monkeypatch.setattr(opening_book, '_books', {})
+    return path
+
+
+def test_book_round_trip(book):
+
+    assert ENTRY.size == 52
+    opened = OpeningBook(book)
+    assert len(opened) == 2
+    assert opened.line('AIPlayer', 6, SHIPS) == tuple(LINE)
+    assert opened.line('AIPlayer', 8, SHIPS) is None
+    opened.close()
+
+
+@pytest.mark.parametrize('player_class', [AIPlayer, DensityAIPlayer])
+def test_players_follow_the_book_until_a_hit(book, player_class):
+
+    images = [[row * 6 + col for row, col in (symmetry(*divmod(number, 6), 5) for number in LINE)]
+              for symmetry in SYMMETRIES]
+    player = player_class(size=6)
+    shots = []
+    for _ in range(3):
+        row, col = player.get_shot_position()
+        player.record_shot_result((row, col), False)
+        shots.append(row * 6 + col)
+    assert any(image[:3] == shots for image in images)
+
+    row, col = player.get_shot_position()
+    player.record_shot_result((row, col), True)
+    assert row * 6 + col == next(image for image in images if image[:3] == shots)[3]
+    assert player.opening is False
@@ -0,0 +1,202 @@
+import asyncio
+import json
+import random
+
+import pytest
+
+from server import GameServer, LocalClient, MAX_GRID_SIZE
+
+
+def cells(size=10):
+
+    return [(row, col) for row in range(size) for col in range(size)]
+
+
+def of_type(messages, kind):
+
+    return [message for message in messages if message['type'] == kind]
+
+
+@pytest.fixture
+def server():
+
+    random.seed(0)
+    return GameServer()
+
+
+def test_full_game_against_ai(server):
+
+    client = LocalClient(server)
+    client.send({'type': 'new', 'mode': 'ai', 'size': 10, 'ai': 'density'})
+    (joined,) = client.take()
+    assert joined['type'] == 'joined' and joined['seat'] == 0 and joined['size'] == 10
+    session = server.sessions[joined['session']]
+
+    client.send({'type': 'place', 'random': True})
+    placed, start = client.take()
+    assert placed == {'type': 'placed', 'remaining': []}
+    assert start == {'type': 'start', 'turn': 0}
+
+    shots = []
+    for row, col in cells():
+        client.send({'type': 'shot', 'row': row, 'col': col})
+        received = client.take()
+        assert not of_type(received, 'error')
+        shots += of_type(received, 'shot')
+        if shots[-1]['game_over']:
+            break
+
+    mine = [shot for shot in shots if shot['seat'] == 0]
+    theirs = [shot for shot in shots if shot['seat'] == 1]
+    assert len(mine) - len(theirs) in (0, 1)
+    last = shots[-1]
+    assert last['winner'] == last['seat'] and last['turn'] is None
+    assert session.controller.game_over
+    assert sum(shot['sunk'] is not None for shot in shots if shot['seat'] == last['seat']) == 5
+
+    client.send({'type': 'shot', 'row': 0, 'col': 0})
+    assert client.take() == [{'type': 'error', 'message': "The game is over"}]
+
+
+def test_full_game_between_two_humans(server):
+
+    host, guest = LocalClient(server), LocalClient(server)
+    host.send({'type': 'new', 'mode': 'human', 'size': 8})
+    session_id = host.take()[0]['session']
+    guest.send({'type': 'join', 'session': session_id})
+    assert guest.take()[0]['seat'] == 1
+    assert host.take() == [{'type': 'opponent_joined'}]
+
+    ## one ship by hand, the rest at random
+    guest.send({'type': 'place', 'ship': 'Patrol Boat', 'row': 0, 'col': 0, 'orientation': 'vertical'})
+    assert guest.take()[0]['remaining'] == ['Aircraft Carrier', 'Battleship', 'Submarine', 'Destroyer']
+    guest.send({'type': 'place', 'random': True})
+    host.send({'type': 'place', 'random': True})
+    assert of_type(guest.take(), 'start') == of_type(host.take(), 'start') == [{'type': 'start', 'turn': 0}]
+
+    targets = {0: iter(cells(8)), 1: iter(cells(8))}
+    clients = {0: host, 1: guest}
+    seat = 0
+    while True:
+        row, col = next(targets[seat])
+        clients[seat].send({'type': 'shot', 'row': row, 'col': col})
+        (shot,) = clients[seat].take()
+        assert clients[1 - seat].take() == [shot]
+        if shot['game_over']:
+            assert shot['winner'] == seat
+            break
+        seat = shot['turn']
+
+    guest.close()
+    assert host.take() == [{'type': 'opponent_left'}]
+    assert session_id not in server.sessions
+
+
+@pytest.mark.parametrize('message, error', [
+    ({'type': 'dance'}, "Unknown message type"),
+    (['new'], "Unknown message type"),
+    ({'type': 'new', 'mode': 'solo'}, "Mode must be 'ai' or 'human'"),
+    ({'type': 'new', 'size': MAX_GRID_SIZE + 1}, f"Size must be an integer from 1 to {MAX_GRID_SIZE}"),
+    ({'type': 'new', 'size': '10'}, f"Size must be an integer from 1 to {MAX_GRID_SIZE}"),
+    ({'type': 'new', 'ai': 'oracle'}, "AI must be one of density, montecarlo, random"),
+    ({'type': 'new', 'mode': 'ai', 'size': 4}, "The fleet does not fit on a 4x4 board"),
+    ({'type': 'new', 'mode': 'human', 'size': 6}, "The fleet does not fit on a 6x6 board"),
+    ({'type': 'join', 'session': 99}, "No open seat in that session"),
+    ({'type': 'place', 'random': True}, "Not in a session"),
+    ({'type': 'shot', 'row': 0, 'col': 0}, "The game has not started"),
+])
+def test_rejects_bad_messages(server, message, error):
+
+    client = LocalClient(server)
+    client.send(message)
+    assert client.take() == [{'type': 'error', 'message': error}]
+
+
+def test_rejects_bad_moves(server):
+
+    host, guest = LocalClient(server), LocalClient(server)
+    host.send({'type': 'new', 'mode': 'human'})
+    session_id = host.take()[0]['session']
+    host.send({'type': 'new'})
+    assert host.take() == [{'type': 'error', 'message': "Already in a session"}]
+    guest.send({'type': 'join', 'session': session_id})
+    guest.take()
+    late = LocalClient(server)
+    late.send({'type': 'join', 'session': session_id})
+    assert late.take() == [{'type': 'error', 'message': "No open seat in that session"}]
+
+    host.send({'type': 'place', 'ship': 'Yacht', 'row': 0, 'col': 0})
+    assert host.take()[-1]['message'] == "Placement needs a ship from the fleet and integer row and col"
+    host.send({'type': 'place', 'ship': 'Battleship', 'row': 0, 'col': 8})
+    assert host.take() == [{'type': 'error', 'message': "Invalid placement"}]
+    host.send({'type': 'place', 'random': True})
+    guest.send({'type': 'place', 'random': True})
+    host.send({'type': 'place', 'random': True})
+    assert host.take()[-1] == {'type': 'error', 'message': "All ships are already placed"}
+    guest.take()
+
+    guest.send({'type': 'shot', 'row': 0, 'col': 0})
+    assert guest.take() == [{'type': 'error', 'message': "Not your turn"}]
+    host.send({'type': 'shot', 'row': 'a', 'col': 0})
+    assert host.take() == [{'type': 'error', 'message': "Shots need integer row and col"}]
+    host.send({'type': 'shot', 'row': 10, 'col': 0})
+    assert host.take() == [{'type': 'error', 'message': "Invalid shot"}]
+    host.send({'type': 'shot', 'row': 0, 'col': 0})
+    guest.send({'type': 'shot', 'row': 0, 'col': 0})
+    host.send({'type': 'shot', 'row': 0, 'col': 0})
+    assert host.take()[-1] == {'type': 'error', 'message': "Invalid shot"}
+
+
+def test_ai_moves_off_the_event_loop():
+
+    ## over TCP the AI's reply arrives after the player's shot, from a worker thread
+    async def play():
+        server = GameServer()
+        listener = await asyncio.start_server(server._handle_client, '127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+
+        async def send(message):
+            writer.write((json.dumps(message) + '\n').encode())
+            await writer.drain()
+
+        async def receive():
+            return json.loads(await asyncio.wait_for(reader.readline(), 10))
+
+        await send({'type': 'new', 'ai': 'density'})
+        assert (await receive())['type'] == 'joined'
+        await send({'type': 'place', 'random': True})
+        assert [(await receive())['type'] for _ in range(2)] == ['placed', 'start']
+        await send({'type': 'shot', 'row': 4, 'col': 4})
+        replies = [await receive(), await receive()]
+        writer.close()
+        listener.close()
+        await listener.wait_closed()
+        return replies
+
+    mine, theirs = asyncio.run(play())
+    assert (mine['seat'], mine['row'], mine['col']) == (0, 4, 4)
+    assert theirs['type'] == 'shot' and theirs['seat'] == 1 and theirs['turn'] == 0
+
+
+def test_a_failing_handler_keeps_the_connection():
+
+    async def play():
+        server = GameServer()
+        server._handlers['new'] = lambda connection, message: 1 / 0
+        listener = await asyncio.start_server(server._handle_client, '127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        replies = []
+        for message in ({'type': 'new'}, {'type': 'place', 'random': True}):
+            writer.write((json.dumps(message) + '\n').encode())
+            await writer.drain()
+            replies.append(json.loads(await asyncio.wait_for(reader.readline(), 10)))
+        writer.close()
+        listener.close()
+        await listener.wait_closed()
+        return replies
+
+    failed, after = asyncio.run(play())
+    assert failed == {'type': 'error', 'message': "The server could not handle that message"}
+    assert after == {'type': 'error', 'message': "Not in a session"}
@@ -0,0 +1,32 @@
+import pytest
+
+from ship import Ship, ShipOrientation
+
+
+def test_hit_mask_is_keyword_only():
+
+    with pytest.raises(TypeError):
+        Ship('Destroyer', 2, [(0, 0), (0, 1)], None, [(0, 0)])
+    with pytest.raises(TypeError):
+        Ship('Destroyer', 2, hit_mask=[(0, 0)])
+    assert Ship('Destroyer', 2, [(0, 0), (0, 1)], hit_mask=0b11).is_sunk()
+
+
+def test_positions_in_any_order():
+
+    ship = Ship('Submarine', 3, [(0, 2), (0, 1), (0, 0)])
+    assert ship.position == ((0, 0), (0, 1), (0, 2))
+    assert ship.take_hit((0, 0))
+    assert ship.is_hit_at((0, 0)) and not ship.is_hit_at((0, 2))
+    assert ship.take_hit((0, 2)) and ship.take_hit((0, 1))
+    assert ship.is_sunk()
+
+
+def test_set_position_in_reverse_keeps_hits():
+
+    ship = Ship('Destroyer', 3, [(0, 0), (0, 1), (0, 2)])
+    ship.take_hit((0, 1))
+    assert ship.set_position([(0, 2), (0, 1), (0, 0)], ShipOrientation.HORIZONTAL)
+    assert ship.hits == [(0, 1)]
+    assert ship.set_position([(3, 1), (2, 1), (1, 1)], ShipOrientation.VERTICAL)
+    assert ship.hits == [] and ship.take_hit((3, 1)) and ship.is_hit_at((3, 1))
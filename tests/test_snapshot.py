@@ -0,0 +1,175 @@
+import random
+
+import pytest
+
+import snapshot
+from ai_player import AIPlayer
+from bitboard_grid import BitboardGrid
+from density_ai_player import DensityAIPlayer
+from game_controller import GameController
+from grid import Grid
+from monte_carlo_ai_player import MonteCarloAIPlayer
+from player import Player
+from ship import Ship
+
+PLAYER_CLASSES = [Player, AIPlayer, DensityAIPlayer, MonteCarloAIPlayer]
+GRID_CLASSES = [Grid, BitboardGrid]
+
+
+def sunk_count(grid):
+
+    return len(grid.ships) - grid.ships_afloat
+
+
+def mid_game(player_class, seed=1):
+
+    ## both seats have fired, and each has sunk a ship unless the game ended first
+    random.seed(seed)
+    controller = GameController(ai_player_class=DensityAIPlayer, player_class=player_class)
+    controller.start_new_game()
+    assert controller.place_player_ships_randomly()
+    for seat in (controller.player, controller.ai_player):
+        if isinstance(seat, MonteCarloAIPlayer):
+            seat.samples, seat.workers = 200, 1
+
+    order = [(row, col) for row in range(10) for col in range(10)]
+    random.shuffle(order)
+    while not controller.game_over and not (sunk_count(controller.player.grid) and sunk_count(controller.ai_player.grid)):
+        if controller.current_turn == 'player':
+            player = controller.player
+            if isinstance(player, AIPlayer):
+                position = player.get_shot_position()
+            else:
+                position = next(pos for pos in order if pos not in controller.ai_player.grid.shots)
+            assert controller.process_player_shot(position) is not None
+        else:
+            assert controller.process_ai_turn() is not None
+    assert sunk_count(controller.ai_player.grid) or sunk_count(controller.player.grid)
+    return controller
+
+
+def assert_same_board(a, b):
+
+    assert set(a.grid.shots) == set(b.grid.shots)
+    assert set(a.grid.hits) == set(b.grid.hits)
+    assert set(a.grid.misses) == set(b.grid.misses)
+    assert a.grid.ships_afloat == b.grid.ships_afloat
+    assert ([(ship.name, tuple(ship.position), ship.hit_mask, ship.is_sunk()) for ship in a.grid.ships]
+            == [(ship.name, tuple(ship.position), ship.hit_mask, ship.is_sunk()) for ship in b.grid.ships])
+    assert a.fleet == b.fleet
+    assert a.remaining_ships == b.remaining_ships
+    assert sorted(a.placed_ships) == sorted(b.placed_ships)
+
+
+def assert_same_player(a, b):
+
+    assert type(a) is type(b)
+    assert_same_board(a, b)
+    if isinstance(a, AIPlayer):
+        assert a.attacked_positions == b.attacked_positions
+        assert a.get_parity() == b.get_parity()
+
+
+def assert_same_knowledge(a, b):
+
+    ## what strategies learned from their shots, rebuilt by replay_observations
+    assert_same_player(a, b)
+    if isinstance(a, DensityAIPlayer):
+        assert a.tried == b.tried
+        assert a.blocked == b.blocked
+        assert a.heat == b.heat
+        assert a.open_hits == b.open_hits
+        assert a.afloat == b.afloat
+        assert a.counts == b.counts
+    if isinstance(a, MonteCarloAIPlayer):
+        assert a.view.value == b.view.value
+
+
+def assert_same_controller(a, b):
+
+    assert (a.grid_size, a.fleet, a.current_turn, a.game_over, a.stats, a.player_name) == \
+           (b.grid_size, b.fleet, b.current_turn, b.game_over, b.stats, b.player_name)
+    assert a.player_class is b.player_class and a.ai_player_class is b.ai_player_class
+    assert_same_knowledge(a.player, b.player)
+    assert_same_knowledge(a.ai_player, b.ai_player)
+
+
+@pytest.mark.parametrize('grid_class', GRID_CLASSES)
+@pytest.mark.parametrize('player_class', PLAYER_CLASSES)
+def test_binary_controller_round_trip(player_class, grid_class):
+
+    controller = mid_game(player_class)
+    restored = snapshot.loads(snapshot.dumps(controller), grid_class)
+    assert isinstance(restored.player.grid, grid_class)
+    assert_same_controller(controller, restored)
+    ## and back out of the restored backend
+    assert_same_controller(controller, snapshot.loads(snapshot.dumps(restored)))
+
+
+@pytest.mark.parametrize('grid_class', GRID_CLASSES)
+@pytest.mark.parametrize('player_class', PLAYER_CLASSES)
+def test_json_controller_round_trip(player_class, grid_class):
+
+    controller = mid_game(player_class)
+    restored = snapshot.loads_json(snapshot.dumps_json(controller), grid_class)
+    assert isinstance(restored.player.grid, grid_class)
+    assert_same_controller(controller, restored)
+    assert_same_controller(controller, snapshot.loads_json(snapshot.dumps_json(restored)))
+
+
+@pytest.mark.parametrize('grid_class', GRID_CLASSES)
+@pytest.mark.parametrize('player_class', PLAYER_CLASSES)
+def test_player_round_trip(player_class, grid_class):
+
+    controller = mid_game(player_class)
+    for player in (controller.player, controller.ai_player):
+        assert_same_player(player, snapshot.loads(snapshot.dumps(player), grid_class))
+        assert_same_player(player, snapshot.loads_json(snapshot.dumps_json(player), grid_class))
+
+
+@pytest.mark.parametrize('grid_class', GRID_CLASSES)
+def test_grid_round_trip(grid_class):
+
+    controller = mid_game(Player)
+    grid = controller.ai_player.grid
+    for restored in (snapshot.loads(snapshot.dumps(grid), grid_class),
+                     snapshot.loads_json(snapshot.dumps_json(grid), grid_class)):
+        assert isinstance(restored, grid_class)
+        assert set(restored.shots) == set(grid.shots) and set(restored.hits) == set(grid.hits)
+        assert [ship.is_sunk() for ship in restored.ships] == [ship.is_sunk() for ship in grid.ships]
+
+
+def test_player_name_round_trip():
+
+    controller = mid_game(Player)
+    controller.player_name = 'Alice'
+    assert snapshot.loads(snapshot.dumps(controller)).player_name == 'Alice'
+    assert snapshot.loads_json(snapshot.dumps_json(controller)).player_name == 'Alice'
+
+
+@pytest.mark.parametrize('grid_class', GRID_CLASSES)
+def test_grid_ships_sharing_a_name_round_trip(grid_class):
+
+    grid = grid_class(8)
+    assert grid.place_ship(Ship('X', 2), (0, 0), 'horizontal')
+    assert grid.place_ship(Ship('X', 3), (2, 0), 'vertical')
+    ships = [(ship.name, ship.size, ship.position) for ship in grid.ships]
+    restored = snapshot.loads(snapshot.dumps(grid), grid_class)
+    assert [(ship.name, ship.size, ship.position) for ship in restored.ships] == ships
+
+
+def test_parity_survives_round_trip():
+
+    player = AIPlayer(parity=1)
+    player.place_ships_randomly()
+    for _ in range(5):
+        player.get_shot_position()
+    restored = snapshot.loads(snapshot.dumps(player))
+    assert restored.get_parity() == 1
+    assert restored.attacked_positions == player.attacked_positions
+
+
+def test_rejects_foreign_data():
+
+    with pytest.raises(ValueError):
+        snapshot.loads(b'not a snapshot')
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from grid import Grid
+from ship import Ship
+from vector_engine import BoardBatch
+
+
+def grid_with(ships):
+
+    grid = Grid(8)
+    for name, size, start, orientation in ships:
+        assert grid.place_ship(Ship(name, size), start, orientation)
+    return grid
+
+
+def test_batch_matches_its_source_grids():
+
+    ## the same fleet placed in different orders, with a repeated name
+    grids = [
+        grid_with([('Carrier', 4, (0, 0), 'horizontal'), ('Boat', 2, (2, 0), 'vertical'),
+                   ('Boat', 3, (7, 3), 'horizontal')]),
+        grid_with([('Boat', 2, (0, 6), 'horizontal'), ('Boat', 3, (2, 2), 'vertical'),
+                   ('Carrier', 4, (7, 4), 'horizontal')]),
+    ]
+    batch = BoardBatch.from_grids(grids, rng=np.random.default_rng(3))
+
+    for cell in np.random.default_rng(5).permutation(64):
+        row, col = divmod(int(cell), 8)
+        valid, hit, sunk = batch.fire(np.array([cell, cell]))
+        assert valid.all()
+        for game, grid in enumerate(grids):
+            grid_hit, grid_sunk = grid.receive_shot((row, col))
+            assert hit[game] == grid_hit
+            if grid_sunk is None:
+                assert sunk[game] == -1
+            else:
+                assert batch.fleet[sunk[game]] == (grid_sunk.name, grid_sunk.size)
+    assert batch.all_ships_sunk().all()
+
+
+def test_grids_with_different_fleets_are_rejected():
+
+    grids = [grid_with([('Boat', 2, (0, 0), 'horizontal')]), grid_with([('Boat', 3, (0, 0), 'horizontal')])]
+    with pytest.raises(ValueError):
+        BoardBatch.from_grids(grids)
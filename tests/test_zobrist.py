@@ -0,0 +1,29 @@
+import threading
+from collections import OrderedDict
+
+from zobrist import EvaluationCache
+
+
+class _PutDuringGet(OrderedDict):
+    ## lets another thread evict the entry between get's lookup and its move_to_end
+
+    def get(self, key, default=None):
+
+        value = super().get(key, default)
+        if self.intruder is not None:
+            self.intruder.start()
+            self.intruder.join(0.2)  # blocks for good only if put could not take the lock
+        return value
+
+
+def test_put_from_another_thread_waits_for_get():
+
+    cache = EvaluationCache(maxsize=1)
+    cache.entries = _PutDuringGet()
+    cache.entries.intruder = None
+    cache.put('a', 1)
+    intruder = cache.entries.intruder = threading.Thread(target=cache.put, args=('b', 2))
+
+    assert cache.get('a') == 1
+    intruder.join()
+    assert list(cache.entries) == ['b'] and cache.hits == 1
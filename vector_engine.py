@@ -0,0 +1,190 @@
+import numpy as np
+
+from placement_index import legal_placements
+from ship import SHIPS
+
+
+class _PlacementTable:
+    ## Every legal placement of one ship size, as flat cell indices and as
+    ## halo indices on a board padded by one cell so the halo never clips
+
+    def __init__(self, board_size, ship_size):
+
+        padded = board_size + 2
+        cells, padded_cells, halos = [], [], []
+        for orientation in ('horizontal', 'vertical'):
+            height, width = (1, ship_size) if orientation == 'horizontal' else (ship_size, 1)
+            for placement in legal_placements(board_size, ship_size, orientation):
+                row, col = placement.start
+                rows = np.arange(row, row + height)[:, None]
+                cols = np.arange(col, col + width)[None, :]
+                cells.append((rows * board_size + cols).ravel())
+                padded_cells.append(((rows + 1) * padded + cols + 1).ravel())
+                halo_rows = np.arange(row, row + height + 2)[:, None]
+                halo_cols = np.arange(col, col + width + 2)[None, :]
+                halos.append((halo_rows * padded + halo_cols).ravel())
+        self.cells = np.array(cells)
+        self.padded_cells = np.array(padded_cells)
+        self.halos = np.array(halos)
+
+
+class BoardBatch:
+    ## Many independent boards held as stacked arrays so one shot in every
+    ## game is a single vectorised step. Cells are flattened to row * size + col,
+    ## ship ids index the fleet, and -1 means water. fleet is a dict of name -> size
+    ## or a list of (name, size) pairs, which may repeat names.
+
+    def __init__(self, games, size=10, fleet=None, rng=None, place=True):
+
+        self.games = games
+        self.size = size
+        fleet = fleet or SHIPS
+        self.fleet = list(fleet.items() if isinstance(fleet, dict) else fleet)
+        self.ship_sizes = np.array([ship_size for _, ship_size in self.fleet], dtype=np.int16)
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+        cells = size * size
+        self.ship_ids = np.full((games, cells), -1, dtype=np.int16)
+        self.shots = np.zeros((games, cells), dtype=bool)
+        self.hits = np.zeros((games, cells), dtype=bool)
+        self.ship_hits = np.zeros((games, len(self.fleet)), dtype=np.int16)
+        self.afloat = np.full(games, len(self.fleet), dtype=np.int16)
+        self._tables = {}
+
+        if place:
+            self._place_fleets(np.arange(games))
+
+    @classmethod
+    def from_grids(cls, grids, rng=None):
+
+        ## Copies the ship layouts (not the shots) of Grid objects. Ship ids follow
+        ## the first grid's ship order; the other grids' ships are matched to them by
+        ## name and size, whatever order they were placed in.
+        first = grids[0]
+        fleet = [(ship.name, ship.size) for ship in first.ships]
+        ids = {}
+        for ship_id, ship in enumerate(fleet):
+            ids.setdefault(ship, []).append(ship_id)
+
+        batch = cls(len(grids), first.size, fleet, rng=rng, place=False)
+        for game, grid in enumerate(grids):
+            if grid.size != first.size or sorted((ship.name, ship.size) for ship in grid.ships) != sorted(fleet):
+                raise ValueError(f"Grid {game} does not hold the same size of board and fleet as grid 0")
+            unused = {ship: list(reversed(numbers)) for ship, numbers in ids.items()}
+            for ship in grid.ships:
+                ship_id = unused[ship.name, ship.size].pop()
+                for row, col in ship.position:
+                    batch.ship_ids[game, row * grid.size + col] = ship_id
+        return batch
+
+    @property
+    def occupied(self):
+
+        return self.ship_ids >= 0
+
+    def _table(self, ship_size):
+
+        if ship_size not in self._tables:
+            self._tables[ship_size] = _PlacementTable(self.size, ship_size)
+        return self._tables[ship_size]
+
+    def _place_fleets(self, games, max_rounds=20, tries_per_ship=64):
+
+        ## vectorised rejection sampling, ship by ship; the few games that run
+        ## out of room for a ship start over in the next round
+        padded = self.size + 2
+        for _ in range(max_rounds):
+            if not games.size:
+                return
+            blocked = np.zeros((games.size, padded * padded), dtype=bool)
+            choice = np.full((games.size, len(self.fleet)), -1, dtype=np.int64)
+            failed = np.zeros(games.size, dtype=bool)
+
+            for ship_id, ship_size in enumerate(self.ship_sizes):
+                table = self._table(int(ship_size))
+                pending = np.flatnonzero(~failed)
+                for _ in range(tries_per_ship):
+                    picks = self.rng.integers(len(table.cells), size=pending.size)
+                    fits = ~blocked[pending[:, None], table.padded_cells[picks]].any(axis=1)
+                    placed = pending[fits]
+                    choice[placed, ship_id] = picks[fits]
+                    blocked[placed[:, None], table.halos[picks[fits]]] = True
+                    pending = pending[~fits]
+                    if not pending.size:
+                        break
+                failed[pending] = True
+
+            done = np.flatnonzero(~failed)
+            for ship_id, ship_size in enumerate(self.ship_sizes):
+                cells = self._table(int(ship_size)).cells[choice[done, ship_id]]
+                self.ship_ids[games[done][:, None], cells] = ship_id
+            games = games[failed]
+
+        raise RuntimeError("Could not place the fleet on every board")
+
+    def fire(self, cells, games=None):
+
+        ## One shot per listed game (games must not repeat). Returns
+        ## (valid, hit, sunk) where sunk holds the ship id sunk by the shot or -1;
+        ## repeated or off-board shots are invalid misses, as in Grid.receive_shot
+        games = np.arange(self.games) if games is None else np.asarray(games)
+        cells = np.asarray(cells)
+        on_board = (cells >= 0) & (cells < self.size * self.size)
+        cells = np.where(on_board, cells, 0)
+
+        valid = on_board & ~self.shots[games, cells]
+        fired = np.flatnonzero(valid)
+        shot_games, shot_cells = games[fired], cells[fired]
+        self.shots[shot_games, shot_cells] = True
+
+        ships = self.ship_ids[shot_games, shot_cells]
+        struck = ships >= 0
+        hit_games, hit_cells, hit_ships = shot_games[struck], shot_cells[struck], ships[struck]
+        self.hits[hit_games, hit_cells] = True
+        self.ship_hits[hit_games, hit_ships] += 1
+
+        sunk_now = self.ship_hits[hit_games, hit_ships] == self.ship_sizes[hit_ships]
+        self.afloat[hit_games[sunk_now]] -= 1
+
+        hit = np.zeros(games.size, dtype=bool)
+        hit[fired[struck]] = True
+        sunk = np.full(games.size, -1, dtype=np.int16)
+        sunk[fired[struck][sunk_now]] = hit_ships[sunk_now]
+        return valid, hit, sunk
+
+    def all_ships_sunk(self):
+
+        return self.afloat == 0
+
+    def get_cell_state(self, game, pos):
+
+        row, col = pos
+        if not (0 <= row < self.size and 0 <= col < self.size):
+            return 'invalid'
+        cell = row * self.size + col
+        if self.hits[game, cell]:
+            return 'hit'
+        if self.shots[game, cell]:
+            return 'miss'
+        if self.ship_ids[game, cell] >= 0:
+            return 'ship'
+        return 'empty'
+
+    def random_untried_cells(self, games=None):
+
+        games = np.arange(self.games) if games is None else np.asarray(games)
+        keys = self.rng.random((games.size, self.size * self.size))
+        keys[self.shots[games]] = -1.0
+        return keys.argmax(axis=1)
+
+    def play_random(self):
+
+        ## Fires random untried shots in every unfinished game until all are
+        ## over and returns the number of shots each game took
+        shots_taken = np.zeros(self.games, dtype=np.int32)
+        active = np.flatnonzero(self.afloat > 0)
+        while active.size:
+            self.fire(self.random_untried_cells(active), active)
+            shots_taken[active] += 1
+            active = active[self.afloat[active] > 0]
+        return shots_taken
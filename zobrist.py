@@ -0,0 +1,164 @@
+import random
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+## What an attacker knows of a cell it has shot at
+MISS, HIT, SUNK = 1, 2, 3
+KEY_BITS = 64
+KEY_MASK = (1 << KEY_BITS) - 1
+
+## the 8 rotations and reflections of a square board, as (row, col) -> (row, col)
+SYMMETRIES = (
+    lambda row, col, last: (row, col),
+    lambda row, col, last: (col, last - row),
+    lambda row, col, last: (last - row, last - col),
+    lambda row, col, last: (last - col, row),
+    lambda row, col, last: (row, last - col),
+    lambda row, col, last: (last - row, col),
+    lambda row, col, last: (col, row),
+    lambda row, col, last: (last - col, last - row),
+)
+
+
+@lru_cache(maxsize=16)
+def symmetry_maps(size):
+
+    ## cell number -> its image under each symmetry, and the inverse maps
+    last = size - 1
+    maps = []
+    for symmetry in SYMMETRIES:
+        cell_map = []
+        for number in range(size * size):
+            row, col = symmetry(*divmod(number, size), last)
+            cell_map.append(row * size + col)
+        maps.append(tuple(cell_map))
+
+    inverses = []
+    for cell_map in maps:
+        inverse = [0] * len(cell_map)
+        for number, image in enumerate(cell_map):
+            inverse[image] = number
+        inverses.append(tuple(inverse))
+    return tuple(maps), tuple(inverses)
+
+
+@lru_cache(maxsize=16)
+def zobrist_keys(size):
+
+    ## keys[state][cell] packs eight 64-bit keys into one int, slot i holding the key of
+    ## the cell's image under symmetry i, so one XOR updates all 8 image hashes.
+    ## Seeded by size, so every process hashes a position the same way.
+    rng = random.Random(size)
+    maps = symmetry_maps(size)[0]
+    keys = [()]
+    for _ in (MISS, HIT, SUNK):
+        base = [rng.getrandbits(KEY_BITS) for _ in range(size * size)]
+        packed = []
+        for number in range(size * size):
+            value = 0
+            for slot, cell_map in enumerate(maps):
+                value |= base[cell_map[number]] << (slot * KEY_BITS)
+            packed.append(value)
+        keys.append(tuple(packed))
+    return tuple(keys)
+
+
+class ZobristView:
+    ## Incrementally updated hash of an attacker's view of a board: its misses,
+    ## hits, and the cells of ships it sank
+
+    __slots__ = ('size', 'keys', 'value')
+
+    def __init__(self, size):
+
+        self.size = size
+        self.keys = zobrist_keys(size)
+        self.value = 0
+
+    def shot(self, position, hit, sunk_ship=None):
+
+        keys = self.keys
+        number = position[0] * self.size + position[1]
+        self.value ^= keys[HIT if hit else MISS][number]
+        if sunk_ship is not None:
+            ## the ship's hits become sunk cells
+            for row, col in sunk_ship.position:
+                number = row * self.size + col
+                self.value ^= keys[HIT][number] ^ keys[SUNK][number]
+
+    def clear(self):
+
+        self.value = 0
+
+    @property
+    def hash(self):
+
+        return self.value & KEY_MASK
+
+    def canonical(self):
+
+        ## (hash, symmetry): the smallest of the 8 image hashes, shared by every
+        ## rotation and reflection of this view, and the symmetry that produced it
+        value = self.value
+        best, best_symmetry = value & KEY_MASK, 0
+        for symmetry in range(1, len(SYMMETRIES)):
+            image = (value >> (symmetry * KEY_BITS)) & KEY_MASK
+            if image < best:
+                best, best_symmetry = image, symmetry
+        return best, best_symmetry
+
+    def to_canonical(self, cells, symmetry):
+
+        cell_map = symmetry_maps(self.size)[0][symmetry]
+        return tuple(cell_map[number] for number in cells)
+
+    def from_canonical(self, cells, symmetry):
+
+        inverse = symmetry_maps(self.size)[1][symmetry]
+        return [inverse[number] for number in cells]
+
+
+class EvaluationCache:
+    ## Least recently used entries go first once maxsize is reached. Shared by every
+    ## player, including ones thinking on the server's worker threads, so every
+    ## access holds the lock.
+
+    __slots__ = ('maxsize', 'entries', 'hits', 'misses', 'lock')
+
+    def __init__(self, maxsize=65536):
+
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+
+        return len(self.entries)
+
+    def get(self, key):
+
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = 0